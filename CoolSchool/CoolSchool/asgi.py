@@ -12,5 +12,19 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CoolSchool.settings')
+os.environ.setdefault('ASYNC_PUBLIC_VIEWS', '1')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+HEALTHZ_PATH = '/healthz'
+
+
+async def application(scope, receive, send):
+    # Liveness probes are answered before Django's middleware, as in wsgi.application.
+    if scope['type'] == 'http' and scope['path'] == HEALTHZ_PATH:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/plain'), (b'content-length', b'2'),
+                                (b'cache-control', b'no-store')]})
+        await send({'type': 'http.response.body', 'body': b'ok'})
+        return
+    await django_application(scope, receive, send)
@@ -17,6 +17,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 CKEDITOR_UPLOAD_PATH = 'ckeditor_uploads/'
+CKEDITOR_STORAGE_BACKEND = 'articles_app.storage.ImageVariantStorage'
+# Uploaded images get variants of these widths (plus WebP copies), used in the srcset written into article HTML.
+RESPONSIVE_IMAGE_WIDTHS = [480, 960, 1440]
+RESPONSIVE_IMAGE_SIZES = '(max-width: 992px) 100vw, 66vw'
+IMAGE_VARIANT_WORKERS = 2
+# Seconds an article save waits for variants of an image that is still being processed.
+IMAGE_VARIANT_WAIT = 10
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
@@ -44,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'articles_app.middleware.ServerTimingMiddleware',
+    'articles_app.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,11 +62,24 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Expose per-request SQL, template render and total time in a Server-Timing response header.
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', '1') == '1'
+# Log requests slower than this many milliseconds to the articles_app.timing logger; unset disables it.
+SLOW_REQUEST_THRESHOLD_MS = (float(os.environ['SLOW_REQUEST_THRESHOLD_MS'])
+                             if os.environ.get('SLOW_REQUEST_THRESHOLD_MS') else None)
+
+# Each process writes its request metrics to <METRICS_DIR>/<pid>.json at most every METRICS_FLUSH_INTERVAL
+# seconds; /metrics sums the files so the numbers cover all gunicorn workers.
+METRICS_DIR = os.environ.get('METRICS_DIR', BASE_DIR / 'metrics')
+METRICS_FLUSH_INTERVAL = 1.0
+# Besides superusers, /metrics answers requests from these addresses.
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
 ROOT_URLCONF = 'CoolSchool.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'articles_app.timing.TimedDjangoTemplates',
         'DIRS': ['articles_app/templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -66,12 +88,16 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'articles_app.context_processors.navigation',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'CoolSchool.wsgi.application'
+ASGI_APPLICATION = 'CoolSchool.asgi.application'
+# Serve the public pages with async views; CoolSchool/asgi.py turns this on unless the environment says otherwise.
+ASYNC_PUBLIC_VIEWS = os.environ.get('ASYNC_PUBLIC_VIEWS') == '1'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -80,9 +106,57 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Applied to every new SQLite connection (articles_app.db). WAL lets public reads proceed during admin writes;
+# set SQLITE_PROFILE=default to run on SQLite's stock settings.
+SQLITE_PROFILES = {
+    'default': {},
+    'performance': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -20000,
+        'busy_timeout': 5000,
+    },
+}
+SQLITE_PRAGMAS = SQLITE_PROFILES[os.environ.get('SQLITE_PROFILE', 'performance')]
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Shared by all workers on the host, so every cache this app keeps warms once per host rather than per worker.
+# Pages and fragments never expire, and the file outlives deploys: entries are keyed on the code and templates
+# that rendered them, so a release never reads the previous one's HTML (which is then evicted as unused).
+CACHES = {
+    'default': {
+        'BACKEND': 'articles_app.sqlite_cache.SQLiteCache',
+        'LOCATION': os.environ.get('CACHE_PATH', BASE_DIR / 'cache.sqlite3'),
+        'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', ''),
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+            # Without a KEY_PREFIX, keys are prefixed with a digest of these sources.
+            'KEY_SOURCES': [BASE_DIR / 'articles_app', BASE_DIR / 'CoolSchool'],
+        },
+    }
+}
+
+# Rendered public pages are invalidated by Article/Page signals, so they never expire on their own.
+PAGE_CACHE_TIMEOUT = None
+
+# Number of articles per page of public and editor listings; older ones are reached through "load more" links.
+ARTICLES_PAGE_SIZE = 10
+# Newest whiteboard articles kept precomputed in the cache for the main page.
+WHITEBOARD_SIZE = 10
+
+# Output of `manage.py prerender`. With PRERENDER_ON_SAVE, Article/Page writes regenerate only the affected files.
+PRERENDER_ROOT = BASE_DIR / 'prerendered'
+PRERENDER_ON_SAVE = os.environ.get('PRERENDER_ON_SAVE') == '1'
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -107,6 +181,8 @@ AUTH_PASSWORD_VALIDATORS = [
 LANGUAGE_CODE = 'pl'
 
 TIME_ZONE = 'UTC'
+# Editors enter and read publication dates in the school's local time.
+EDITOR_TIME_ZONE = 'Europe/Warsaw'
 
 USE_I18N = True
 
@@ -121,6 +197,21 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'static_root'
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'articles_app.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+# Fingerprinted files never change under the same name; everything else is revalidated hourly.
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+STATIC_MAX_AGE = 60 * 60
+MEDIA_MAX_AGE = 60 * 60 * 24
+# Serve STATIC_ROOT and MEDIA_ROOT from Django (sendfile through gunicorn); disable when a front server does it.
+SERVE_FILES = os.environ.get('SERVE_FILES', '1') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -136,3 +227,21 @@ DEFAULT_PAGES = {
 }
 
 CSRF_TRUSTED_ORIGINS = ['https://coolschoolbochnia.azurewebsites.net']
+
+# Runs the suite against a scratch cache file instead of the one the site's workers share.
+TEST_RUNNER = 'articles_app.test_runner.DiscoverRunner'
+
+# Public address of the site, used for absolute links in cached responses instead of the requesting Host.
+SITE_URL = os.environ.get('SITE_URL', CSRF_TRUSTED_ORIGINS[0])
+
+# Warm-up results and slow requests go to stderr, which gunicorn's master and workers share with the host's log.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'articles_app': {'handlers': ['console'], 'level': os.environ.get('APP_LOG_LEVEL', 'INFO')},
+    },
+}
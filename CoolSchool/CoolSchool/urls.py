@@ -1,6 +1,8 @@
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
 from articles_app.admin import admin_site
+from articles_app.static_files import serve_media, serve_static
 """
 URL configuration for CoolSchool project.
 
@@ -18,11 +20,18 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 
 urlpatterns = [
     path("admin/", admin_site.urls),
-    path("", include("articles_app.urls")),
     path("ckeditor/", include("ckeditor_uploader.urls")),
 ]
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+if settings.SERVE_FILES:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static),
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+    ]
+# Last, so the generic page route cannot shadow the routes above.
+urlpatterns += [
+    path("", include("articles_app.urls")),
+]
@@ -13,4 +13,15 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CoolSchool.settings')
 
-application = get_wsgi_application()
+django_application = get_wsgi_application()
+
+HEALTHZ_PATH = '/healthz'
+
+
+def application(environ, start_response):
+    # Liveness probes are answered before Django's middleware, so they stay cheap and never touch the database.
+    if environ.get('PATH_INFO') == HEALTHZ_PATH:
+        start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', '2'),
+                                  ('Cache-Control', 'no-store')])
+        return [b'ok']
+    return django_application(environ, start_response)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ArticlesAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articles_app'
+
+    def ready(self):
+        from . import db, signals, timing  # noqa: F401
@@ -0,0 +1,19 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import render
+
+from .cache import cache_page_response, conditional_page
+from .models import MAIN_PAGE_SLUG, Article
+from .pagination import apaginate_articles
+from .views import public_page, public_page_title
+from .whiteboard import aget_whiteboard
+
+
+@conditional_page(public_page_title)
+@cache_page_response(public_page_title)
+async def page(request, slug=None):
+    entry = await sync_to_async(public_page)(slug)
+    context = {'current_page_name': entry.title,
+               **await apaginate_articles(request, Article.objects.for_page(entry.title).published())}
+    if entry.slug == MAIN_PAGE_SLUG:
+        context['news_articles'] = await aget_whiteboard()
+    return await sync_to_async(render)(request, entry.template, context)
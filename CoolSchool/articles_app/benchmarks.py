@@ -0,0 +1,184 @@
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import OperationalError, close_old_connections, connections
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from .models import Article, Page
+from .sqlite_cache import scratch_caches
+
+PUBLIC_PATHS = ['/', '/news/', '/courses/', '/regulamin/', '/privacy_policy/', '/contact/']
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """Run against a freshly migrated throwaway SQLite file, cache and METRICS_DIR instead of the site's."""
+    connection = connections['default']
+    old_name = connection.settings_dict['NAME']
+    old_test_settings = connection.settings_dict.get('TEST', {})
+    with tempfile.TemporaryDirectory() as directory, \
+            override_settings(CACHES=scratch_caches(directory), METRICS_DIR=os.path.join(directory, 'metrics')):
+        connection.settings_dict['TEST'] = {**old_test_settings, 'NAME': os.path.join(directory, 'bench.sqlite3')}
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity)
+            teardown_test_environment()
+            connection.settings_dict['TEST'] = old_test_settings
+
+
+def seed_articles(articles_per_page, batch_size=500):
+    content = '<p>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 20 + '</p>'
+    now = timezone.now()
+    articles = []
+    for page in Page.objects.all():
+        for number in range(articles_per_page):
+            article = Article(title=f'{page.title} {number}', content=content, page=page,
+                              pub_date=now - timedelta(minutes=number), show_on_whiteboard=number % 5 == 0)
+            article.process_content()
+            articles.append(article)
+    Article.objects.bulk_create(articles, batch_size=batch_size)
+    cache.clear()
+    return len(articles)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """samples: list of (label, seconds, status[, queries]) tuples."""
+    latencies = sorted(sample[1] for sample in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[2] >= 400),
+        'req_per_s': len(samples) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def run_wsgi(paths, requests, concurrency):
+    def worker(indexes):
+        client = Client()
+        samples = []
+        for index in indexes:
+            path = paths[index % len(paths)]
+            start = time.perf_counter()
+            response = client.get(path)
+            samples.append((path, time.perf_counter() - start, response.status_code))
+        connections.close_all()
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        chunks = executor.map(worker, [range(worker_number, requests, concurrency)
+                                       for worker_number in range(concurrency)])
+        samples = [sample for chunk in chunks for sample in chunk]
+    return samples, time.perf_counter() - start
+
+
+def run_routes(routes, requests, concurrency, user):
+    """Request (name, path, authenticated) routes round-robin; samples carry the SQL query count of each request."""
+    def worker(indexes):
+        clients = {False: Client(), True: Client()}
+        clients[True].force_login(user)
+        samples = []
+        query_count = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            query_count[0] += 1
+            return execute(sql, params, many, context)
+
+        with connections['default'].execute_wrapper(count_queries):
+            for index in indexes:
+                name, path, authenticated = routes[index % len(routes)]
+                query_count[0] = 0
+                start = time.perf_counter()
+                response = clients[authenticated].get(path)
+                samples.append((name, time.perf_counter() - start, response.status_code, query_count[0]))
+        connections.close_all()
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        chunks = executor.map(worker, [range(worker_number, requests, concurrency)
+                                       for worker_number in range(concurrency)])
+        samples = [sample for chunk in chunks for sample in chunk]
+    return samples, time.perf_counter() - start
+
+
+def run_asgi(paths, requests, concurrency):
+    async def worker(indexes):
+        client = AsyncClient()
+        samples = []
+        for index in indexes:
+            path = paths[index % len(paths)]
+            start = time.perf_counter()
+            response = await client.get(path)
+            samples.append((path, time.perf_counter() - start, response.status_code))
+        return samples
+
+    async def main():
+        chunks = await asyncio.gather(*[worker(range(worker_number, requests, concurrency))
+                                        for worker_number in range(concurrency)])
+        return [sample for chunk in chunks for sample in chunk]
+
+    start = time.perf_counter()
+    samples = asyncio.run(main())
+    return samples, time.perf_counter() - start
+
+
+def run_mixed_load(readers, writers, duration, conn_max_age):
+    """Public-style listing reads racing editor-style article writes; returns ({'read'|'write': samples}, elapsed)."""
+    page = Page.objects.get(title='Aktualności')
+    deadline = time.monotonic() + duration
+    settings_dict = connections['default'].settings_dict
+    old_conn_max_age, settings_dict['CONN_MAX_AGE'] = settings_dict['CONN_MAX_AGE'], conn_max_age
+
+    def read():
+        list(Article.objects.for_page('Aktualności')[:10])
+        list(Article.objects.on_whiteboard().only('id', 'title', 'excerpt')[:10])
+
+    def write(number):
+        Article.objects.create(title=f'Load {number}', content='<p>Load</p>', pub_date=timezone.now(), page=page)
+
+    def worker(kind):
+        samples = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                read() if kind == 'read' else write(len(samples))
+                status = 200
+            except OperationalError:
+                status = 503
+            samples.append((kind, time.perf_counter() - start, status))
+            # Mirrors the request_finished handler: connections older than CONN_MAX_AGE are closed.
+            close_old_connections()
+        connections.close_all()
+        return samples
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=readers + writers) as executor:
+            chunks = list(executor.map(worker, ['read'] * readers + ['write'] * writers))
+    finally:
+        settings_dict['CONN_MAX_AGE'] = old_conn_max_age
+    elapsed = time.perf_counter() - start
+    samples = [sample for chunk in chunks for sample in chunk]
+    return {kind: [sample for sample in samples if sample[0] == kind] for kind in ('read', 'write')}, elapsed
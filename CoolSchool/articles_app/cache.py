@@ -0,0 +1,203 @@
+from functools import wraps
+from inspect import iscoroutinefunction
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Min, Q
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from .models import MAIN_PAGE_NAME, NEWS_PAGE_NAME, Article, Page
+
+PAGE_CACHE_PREFIX = 'articles_app:page:'
+PAGE_STATE_PREFIX = 'articles_app:page_state:'
+
+# Representations of a page cached next to its HTML (e.g. feeds); filled in as views are decorated.
+_variants = {None}
+
+
+def page_cache_key(page_name, variant=None):
+    key = f'{PAGE_CACHE_PREFIX}{quote(page_name)}'
+    return f'{key}:{variant}' if variant else key
+
+
+def page_state_key(page_name):
+    return f'{PAGE_STATE_PREFIX}{quote(page_name)}'
+
+
+def shown_articles(page_name):
+    articles = Q(page__title=page_name)
+    if page_name == MAIN_PAGE_NAME:
+        articles |= Q(page__title=NEWS_PAGE_NAME, show_on_whiteboard=True)
+    return Article.objects.filter(articles)
+
+
+def publication_bounds(page_name):
+    now = timezone.now()
+    return {'last_published': Max('pub_date', filter=Q(pub_date__lte=now)),
+            'next_publish': Min('pub_date', filter=Q(pub_date__gt=now))}
+
+
+def page_state(page, bounds):
+    """(ETag, Last-Modified, next scheduled publication) of a page, or Nones for a missing one.
+
+    A scheduled article going live changes no row, so the newest publication date is part of the
+    state: the ETag and Last-Modified move forward the moment it appears.
+    """
+    if not page:
+        return None, None, None
+    last_published = bounds['last_published']
+    etag = f'{page["id"]}-{page["version"]}-{int(last_published.timestamp()) if last_published else 0}'
+    last_modified = max(filter(None, [page['updated_at'], last_published]))
+    return etag, last_modified, bounds['next_publish']
+
+
+def cache_timeout(next_publish):
+    """PAGE_CACHE_TIMEOUT, cut short so that nothing cached outlives the next scheduled publication."""
+    if next_publish is None:
+        return settings.PAGE_CACHE_TIMEOUT
+    seconds = int((next_publish - timezone.now()).total_seconds())
+    if settings.PAGE_CACHE_TIMEOUT is not None:
+        seconds = min(seconds, settings.PAGE_CACHE_TIMEOUT)
+    return max(seconds, 0)
+
+
+def get_page_state(page_name):
+    state = cache.get(page_state_key(page_name))
+    if state is None:
+        page = Page.objects.filter(title=page_name).values('id', 'version', 'updated_at').first()
+        state = page_state(page, shown_articles(page_name).aggregate(**publication_bounds(page_name)))
+        cache.set(page_state_key(page_name), state, cache_timeout(state[2]))
+    return state
+
+
+async def aget_page_state(page_name):
+    state = await cache.aget(page_state_key(page_name))
+    if state is None:
+        page = await Page.objects.filter(title=page_name).values('id', 'version', 'updated_at').afirst()
+        state = page_state(page, await shown_articles(page_name).aaggregate(**publication_bounds(page_name)))
+        await cache.aset(page_state_key(page_name), state, cache_timeout(state[2]))
+    return state
+
+
+def is_cacheable_request(request):
+    return request.method in ('GET', 'HEAD') and not request.GET and not request.user.is_authenticated
+
+
+def cached_response(cached):
+    if cached is None:
+        return None
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def cacheable_content(response):
+    if response.status_code != 200 or response.streaming:
+        return None
+    return response.content, response['Content-Type']
+
+
+def get_cached_response(page_name, variant=None):
+    return cached_response(cache.get(page_cache_key(page_name, variant)))
+
+
+async def aget_cached_response(page_name, variant=None):
+    return cached_response(await cache.aget(page_cache_key(page_name, variant)))
+
+
+def set_cached_response(page_name, response, variant=None):
+    content = cacheable_content(response)
+    if content is not None:
+        timeout = cache_timeout(get_page_state(page_name)[2])
+        cache.set(page_cache_key(page_name, variant), content, timeout)
+
+
+async def aset_cached_response(page_name, response, variant=None):
+    content = cacheable_content(response)
+    if content is not None:
+        timeout = cache_timeout((await aget_page_state(page_name))[2])
+        await cache.aset(page_cache_key(page_name, variant), content, timeout)
+
+
+def invalidate_page(*page_names):
+    cache.delete_many([page_cache_key(page_name, variant) for page_name in page_names for variant in _variants] +
+                      [page_state_key(page_name) for page_name in page_names])
+
+
+def invalidate_all_pages():
+    invalidate_page(*Page.objects.values_list('title', flat=True))
+
+
+def page_name_of(page_name, request, args, kwargs):
+    """page_name is either a title or a function of the view's arguments returning one."""
+    return page_name(request, *args, **kwargs) if callable(page_name) else page_name
+
+
+def cache_page_response(page_name, variant=None):
+    _variants.add(variant)
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if not await sync_to_async(is_cacheable_request)(request):
+                    return await view_func(request, *args, **kwargs)
+                name = await sync_to_async(page_name_of)(page_name, request, args, kwargs)
+                response = await aget_cached_response(name, variant)
+                request.page_cache = 'miss' if response is None else 'hit'
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                    await aset_cached_response(name, response, variant)
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+            name = page_name_of(page_name, request, args, kwargs)
+            response = get_cached_response(name, variant)
+            request.page_cache = 'miss' if response is None else 'hit'
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                set_cached_response(name, response, variant)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(page_name):
+    def state(request, *args, **kwargs):
+        return get_page_state(page_name_of(page_name, request, args, kwargs))
+
+    sync_condition = condition(etag_func=lambda *args, **kwargs: state(*args, **kwargs)[0],
+                               last_modified_func=lambda *args, **kwargs: state(*args, **kwargs)[1])
+
+    def decorator(view_func):
+        if not iscoroutinefunction(view_func):
+            return sync_condition(view_func)
+
+        # django.views.decorators.http.condition only wraps sync views in Django 4.2.
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view_func(request, *args, **kwargs)
+            name = await sync_to_async(page_name_of)(page_name, request, args, kwargs)
+            etag, last_modified, _ = await aget_page_state(name)
+            etag = quote_etag(etag) if etag else None
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if etag and not response.has_header('ETag'):
+                response.headers['ETag'] = etag
+            if timestamp and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(timestamp)
+            return response
+        return async_wrapper
+    return decorator
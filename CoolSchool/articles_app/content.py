@@ -0,0 +1,61 @@
+import html
+import math
+
+from lxml import etree, html as lxml_html
+from lxml.html.clean import Cleaner
+from django.utils.text import Truncator
+
+from .images import add_responsive_sources
+
+EXCERPT_WORDS = 30
+WORDS_PER_MINUTE = 200
+# Elements that run on within a line; any other element (figure, figcaption, td, section...) separates words.
+INLINE_TAGS = {'a', 'abbr', 'b', 'bdi', 'bdo', 'big', 'cite', 'code', 'data', 'del', 'dfn', 'em', 'font', 'i', 'ins',
+               'kbd', 'mark', 'q', 's', 'samp', 'small', 'span', 'strike', 'strong', 'sub', 'sup', 'time', 'tt',
+               'u', 'var'}
+
+# CKEditor output keeps its inline styles and embeds; scripts, event handlers and forms are dropped.
+cleaner = Cleaner(page_structure=False, style=False, inline_style=False, embedded=False, frames=False,
+                  forms=True, safe_attrs_only=False)
+
+
+def parse_fragment(content):
+    return lxml_html.fragment_fromstring(content, create_parent='div')
+
+
+def serialize_children(fragment):
+    return ''.join([html.escape(fragment.text or '')] +
+                   [lxml_html.tostring(child, encoding='unicode') for child in fragment])
+
+
+def fragment_text(fragment):
+    # Block boundaries separate words even when the markup has no whitespace between them.
+    for element in fragment.iterdescendants(etree.Element):
+        if element.tag not in INLINE_TAGS:
+            element.text = ' ' + (element.text or '')
+            element.tail = ' ' + (element.tail or '')
+    return ' '.join(fragment.text_content().split())
+
+
+def plain_text(content_html):
+    if not content_html or not content_html.strip():
+        return ''
+    return fragment_text(parse_fragment(content_html))
+
+
+def process_content(content):
+    """Derive the columns stored next to Article.content from its raw RichTextField HTML."""
+    if not content or not content.strip():
+        return {'content_html': '', 'excerpt': '', 'word_count': 0, 'reading_time': 0}
+    fragment = parse_fragment(content)
+    cleaner(fragment)
+    add_responsive_sources(fragment)
+    content_html = serialize_children(fragment)
+    text = fragment_text(fragment)
+    word_count = len(text.split())
+    return {
+        'content_html': content_html,
+        'excerpt': Truncator(text).words(EXCERPT_WORDS),
+        'word_count': word_count,
+        'reading_time': math.ceil(word_count / WORDS_PER_MINUTE),
+    }
@@ -0,0 +1,7 @@
+from django.utils.functional import SimpleLazyObject
+
+from .navigation import get_nav_items
+
+
+def navigation(request):
+    return {'nav_items': SimpleLazyObject(get_nav_items)}
@@ -0,0 +1,69 @@
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from .cache import cache_page_response, conditional_page
+from .models import NEWS_PAGE_NAME, Article
+from .navigation import get_page_map
+
+FEED_ITEMS = 20
+WHITEBOARD_CATEGORY = 'Tablica'
+
+
+def site_url(path):
+    # The feeds are cached for every visitor, so their links can't come from the first requester's Host.
+    return urljoin(settings.SITE_URL, path)
+
+
+def news_page_url():
+    return site_url(next(entry.url for entry in get_page_map().values() if entry.title == NEWS_PAGE_NAME))
+
+
+class NewsRssFeed(Feed):
+    """Newest Aktualności articles; whiteboard articles carry the Tablica category."""
+
+    title = 'Cool School – Aktualności'
+    description = 'Aktualności szkoły Cool School'
+    url_name = 'news_rss_feed'
+
+    def link(self):
+        return news_page_url()
+
+    def feed_url(self):
+        return site_url(reverse(self.url_name))
+
+    def items(self):
+        return Article.objects.for_page(NEWS_PAGE_NAME).published().only(
+            'id', 'title', 'content_html', 'pub_date', 'updated_at', 'show_on_whiteboard')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.content_html
+
+    def item_link(self, item):
+        return f'{news_page_url()}#article_{item.id}'
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+    def item_categories(self, item):
+        return [WHITEBOARD_CATEGORY] if item.show_on_whiteboard else []
+
+
+class NewsAtomFeed(NewsRssFeed):
+    feed_type = Atom1Feed
+    subtitle = NewsRssFeed.description
+    url_name = 'news_atom_feed'
+
+
+# The news page's version changes with every news article, so the feeds share its ETag and invalidation.
+news_rss_feed = conditional_page(NEWS_PAGE_NAME)(cache_page_response(NEWS_PAGE_NAME, 'rss')(NewsRssFeed()))
+news_atom_feed = conditional_page(NEWS_PAGE_NAME)(cache_page_response(NEWS_PAGE_NAME, 'atom')(NewsAtomFeed()))
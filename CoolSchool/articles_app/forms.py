@@ -1,12 +1,20 @@
 from django import forms
+from django.conf import settings
+from django.utils import timezone
 from .models import Article
 from ckeditor.widgets import CKEditorWidget
 
 
 class ArticleForm(forms.ModelForm):
+    pub_date = forms.DateTimeField(
+        label='Data publikacji', required=False,
+        widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+        help_text=f'Czas lokalny ({settings.EDITOR_TIME_ZONE}). Zostaw puste, aby opublikować od razu; '
+                  'data w przyszłości zaplanuje publikację.')
+
     class Meta:
         model = Article
-        fields = ['title', 'content']
+        fields = ['title', 'content', 'pub_date']
         labels = {
             'title': 'Tytuł',
             'content': 'Treść'
@@ -14,3 +22,12 @@ class ArticleForm(forms.ModelForm):
         widgets = {
             'content': CKEditorWidget(),
         }
+
+    def clean_pub_date(self):
+        pub_date = self.cleaned_data['pub_date']
+        if pub_date is None:
+            return self.instance.pub_date if self.instance.pk else timezone.now()
+        # The widget drops seconds, so an untouched date keeps the stored value (and the article's order).
+        if self.instance.pk and pub_date == self.instance.pub_date.replace(second=0, microsecond=0):
+            return self.instance.pub_date
+        return pub_date
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from lxml import html as lxml_html
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    UNREADABLE_IMAGE_ERRORS = ()
+else:
+    # The uploader accepts any file, so a .jpg may not be an image (UnidentifiedImageError is an OSError).
+    UNREADABLE_IMAGE_ERRORS = (OSError, ValueError, SyntaxError, Image.DecompressionBombError)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+# EXIF orientations that rotate the picture by 90 degrees, swapping its displayed width and height.
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+PENDING_POLL_INTERVAL = 0.1
+
+executor = ThreadPoolExecutor(max_workers=settings.IMAGE_VARIANT_WORKERS, thread_name_prefix='image-variants')
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def is_variant_source(name):
+    path = PurePosixPath(name)
+    return (Image is not None and path.suffix.lower() in IMAGE_EXTENSIONS
+            and name.startswith(settings.CKEDITOR_UPLOAD_PATH))
+
+
+def variant_name(name, width, extension=None):
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}-{width}w{extension or path.suffix}'))
+
+
+def media_path(name):
+    return os.path.join(settings.MEDIA_ROOT, name)
+
+
+def pending_marker(name):
+    """Exists while variants of name are being generated, so any worker's article save can wait for them."""
+    return f'{media_path(name)}.pending'
+
+
+def display_width(image):
+    orientation = image.getexif().get(0x0112)
+    return image.height if orientation in TRANSPOSED_ORIENTATIONS else image.width
+
+
+def save_image(image, name, **params):
+    path = media_path(name)
+    tmp_path = f'{path}.tmp'
+    image.save(tmp_path, format=params.pop('format'), **params)
+    os.replace(tmp_path, path)
+
+
+def generate_variants(name):
+    try:
+        with Image.open(media_path(name)) as original:
+            original.load()
+            save_format = original.format
+            # Variants are served without EXIF, so phone photos are turned upright here.
+            upright = ImageOps.exif_transpose(original)
+        params = {'icc_profile': original.info['icc_profile']} if original.info.get('icc_profile') else {}
+        save_image(upright, variant_name(name, upright.width, '.webp'), format='WEBP', quality=80, **params)
+        for width in settings.RESPONSIVE_IMAGE_WIDTHS:
+            if width >= upright.width:
+                continue
+            height = round(upright.height * width / upright.width)
+            resized = upright.resize((width, height), Image.LANCZOS)
+            save_image(resized, variant_name(name, width), format=save_format, **params)
+            save_image(resized, variant_name(name, width, '.webp'), format='WEBP', quality=80, **params)
+    finally:
+        try:
+            os.remove(pending_marker(name))
+        except FileNotFoundError:
+            pass
+
+
+def _forget(name):
+    with _pending_lock:
+        _pending.pop(name, None)
+
+
+def schedule_variants(name):
+    open(pending_marker(name), 'w').close()
+    with _pending_lock:
+        future = executor.submit(generate_variants, name)
+        _pending[name] = future
+    future.add_done_callback(lambda _: _forget(name))
+    return future
+
+
+def wait_for_variants(name):
+    """Wait for variants still being generated, by this process or (through the marker file) by another."""
+    future = _pending.get(name)
+    if future is not None:
+        try:
+            future.result(timeout=settings.IMAGE_VARIANT_WAIT)
+        except (TimeoutError, *UNREADABLE_IMAGE_ERRORS):
+            pass
+        return
+    deadline = time.monotonic() + settings.IMAGE_VARIANT_WAIT
+    while os.path.exists(pending_marker(name)) and time.monotonic() < deadline:
+        time.sleep(PENDING_POLL_INTERVAL)
+
+
+def srcset(name, extension=None):
+    with Image.open(media_path(name)) as original:
+        original_width = display_width(original)
+    candidates = [(variant_name(name, width, extension), width)
+                  for width in settings.RESPONSIVE_IMAGE_WIDTHS if width < original_width]
+    candidates.append((variant_name(name, original_width, '.webp') if extension else name, original_width))
+    return ', '.join(f'{settings.MEDIA_URL}{candidate} {width}w'
+                     for candidate, width in candidates if os.path.exists(media_path(candidate)))
+
+
+def uploaded_image_name(src):
+    upload_url = f'{settings.MEDIA_URL}{settings.CKEDITOR_UPLOAD_PATH}'
+    if not src or not src.startswith(upload_url):
+        return None
+    name = src[len(settings.MEDIA_URL):]
+    if not is_variant_source(name) or not os.path.exists(media_path(name)):
+        return None
+    return name
+
+
+def add_responsive_sources(fragment):
+    """Give uploaded images a srcset of their resized variants and a WebP <source> inside a <picture>.
+
+    Uploads that can't be read as images are left as they are.
+    """
+    if Image is None:
+        return
+    for img in list(fragment.iter('img')):
+        name = uploaded_image_name(img.get('src'))
+        if name is None or img.get('srcset') or img.getparent().tag == 'picture':
+            continue
+        try:
+            wait_for_variants(name)
+            jpeg_srcset, webp_srcset = srcset(name), srcset(name, '.webp')
+        except UNREADABLE_IMAGE_ERRORS:
+            continue
+        img.set('srcset', jpeg_srcset)
+        img.set('sizes', settings.RESPONSIVE_IMAGE_SIZES)
+        if not webp_srcset:
+            continue
+        picture = lxml_html.Element('picture')
+        img.addprevious(picture)
+        picture.tail, img.tail = img.tail, None
+        picture.append(lxml_html.Element('source', type='image/webp', srcset=webp_srcset,
+                                         sizes=settings.RESPONSIVE_IMAGE_SIZES))
+        picture.append(img)
@@ -0,0 +1,113 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+
+from articles_app import urls as articles_urls
+from articles_app.benchmarks import benchmark_database, run_routes, seed_articles, summarize
+from articles_app.models import MAIN_PAGE_SLUG, Article
+from articles_app.navigation import get_page_map
+
+# Routes that change state when requested; they are listed as skipped instead of being hammered.
+UNSAFE_ROUTES = {'logout', 'delete_article'}
+# Cached pages answer in well under a millisecond, so relative tolerance alone would flag scheduler jitter.
+LATENCY_SLACK_MS = 5.0
+
+
+def route_variants(pattern, article_id):
+    """(label, kwargs) pairs to request a pattern with: one per page for the generic page routes."""
+    converters = pattern.pattern.converters
+    if 'slug' in converters:
+        return [(f'{pattern.name}:{entry.slug}', {'slug': entry.slug}) for entry in get_page_map().values()
+                if not (pattern.name == 'page' and entry.slug == MAIN_PAGE_SLUG)]
+    return [(pattern.name, {name: article_id for name in converters})]
+
+
+def benchmark_routes():
+    article_id = Article.objects.values_list('id', flat=True).first()
+    anonymous = Client()
+    routes, skipped = [], []
+    for pattern in articles_urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or pattern.name in UNSAFE_ROUTES:
+            skipped.append(pattern.name)
+            continue
+        for name, kwargs in route_variants(pattern, article_id):
+            path = reverse(pattern.name, kwargs=kwargs)
+            response = anonymous.get(path)
+            authenticated = response.status_code == 302 and response['Location'].startswith(settings.LOGIN_URL)
+            routes.append((name, path, authenticated))
+    return routes, skipped
+
+
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['p95_ms'] > expected['p95_ms'] * (1 + tolerance) + LATENCY_SLACK_MS:
+            regressions.append(f"{name}: p95 {result['p95_ms']:.2f} ms > baseline {expected['p95_ms']:.2f} ms")
+        if result['req_per_s'] < expected['req_per_s'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['req_per_s']:.1f} req/s < baseline {expected['req_per_s']:.1f}")
+        if result['queries'] > expected['queries']:
+            regressions.append(f"{name}: {result['queries']} queries > baseline {expected['queries']}")
+    return regressions
+
+
+class Command(BaseCommand):
+    help = ('Seeds a throwaway database, requests every route of articles_app.urls concurrently and reports '
+            'req/s, p50/p95/p99 latency and SQL queries per view, optionally against a stored baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1200, help='Total requests over all routes.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--articles', type=int, default=200, help='Articles seeded per page.')
+        parser.add_argument('--no-page-cache', action='store_true',
+                            help='Render every request instead of serving the response cache.')
+        parser.add_argument('--baseline', type=Path, help='Fail when results regress against this JSON file.')
+        parser.add_argument('--save-baseline', type=Path, help='Write the results to this JSON file.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative latency/throughput regression, default 0.25.')
+
+    def handle(self, *args, **options):
+        timeout = 0 if options['no_page_cache'] else settings.PAGE_CACHE_TIMEOUT
+        with benchmark_database(), override_settings(PAGE_CACHE_TIMEOUT=timeout):
+            seed_articles(options['articles'])
+            user = User.objects.create_superuser('bench', 'bench@example.com', 'bench')
+            routes, skipped = benchmark_routes()
+            samples, elapsed = run_routes(routes, options['requests'], options['concurrency'], user)
+
+        results = {}
+        for name, _, _ in routes:
+            route_samples = [sample for sample in samples if sample[0] == name]
+            # With fewer --requests than routes, the tail of the route list is never requested.
+            if not route_samples:
+                continue
+            results[name] = summarize(route_samples, elapsed)
+            results[name]['queries'] = max(sample[3] for sample in route_samples)
+        self.report(results, summarize(samples, elapsed), skipped)
+
+        if options['save_baseline']:
+            options['save_baseline'].write_text(json.dumps(results, indent=2, sort_keys=True))
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+        if options['baseline']:
+            regressions = find_regressions(results, json.loads(options['baseline'].read_text()),
+                                           options['tolerance'])
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline.'))
+
+    def report(self, results, total, skipped):
+        self.stdout.write(f"{'view':26} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+                          f"{'queries':>8} {'errors':>7}")
+        for name, result in [*results.items(), ('TOTAL', {**total, 'queries': ''})]:
+            self.stdout.write(f"{name:26} {result['req_per_s']:9.1f} {result['p50_ms']:9.2f} "
+                              f"{result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {result['queries']:>8} "
+                              f"{result['errors']:7}")
+        if skipped:
+            self.stdout.write(f"Skipped state-changing routes: {', '.join(skipped)}")
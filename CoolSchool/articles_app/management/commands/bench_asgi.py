@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from articles_app.benchmarks import PUBLIC_PATHS, benchmark_database, run_asgi, run_wsgi, seed_articles, summarize
+
+MODES = {'wsgi': run_wsgi, 'asgi': run_asgi}
+
+
+class Command(BaseCommand):
+    help = ('Compares the async (ASGI) public views with the sync (WSGI) ones in one process each, '
+            'against a throwaway database seeded with articles.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=600)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--articles', type=int, default=200, help='Articles seeded per page.')
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request; can be repeated.')
+        parser.add_argument('--no-page-cache', action='store_true',
+                            help='Render every request instead of serving the response cache.')
+        parser.add_argument('--mode', choices=MODES, help='Run one handler in this process and print JSON.')
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            self.stdout.write(json.dumps(self.run_mode(options)))
+            return
+        results = {mode: self.run_child(mode, options) for mode in MODES}
+        self.stdout.write(f"{'':6} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}")
+        for mode, result in results.items():
+            self.stdout.write(f"{mode:6} {result['req_per_s']:10.1f} {result['p50_ms']:10.2f} "
+                              f"{result['p95_ms']:10.2f} {result['p99_ms']:10.2f} {result['errors']:8}")
+        speedup = results['asgi']['req_per_s'] / results['wsgi']['req_per_s']
+        self.stdout.write(self.style.SUCCESS(f'ASGI throughput is {speedup:.2f}x WSGI.'))
+
+    def run_child(self, mode, options):
+        # Each handler gets its own process, so URLconf and settings match how it is deployed.
+        command = [sys.executable, '-m', 'django', 'bench_asgi', '--mode', mode,
+                   '--requests', str(options['requests']), '--concurrency', str(options['concurrency']),
+                   '--articles', str(options['articles'])]
+        for path in options['paths'] or []:
+            command += ['--path', path]
+        if options['no_page_cache']:
+            command.append('--no-page-cache')
+        env = {**os.environ, 'ASYNC_PUBLIC_VIEWS': '1' if mode == 'asgi' else '0'}
+        result = subprocess.run(command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f'{mode} benchmark failed:\n{result.stderr}')
+        return json.loads(result.stdout)
+
+    def run_mode(self, options):
+        timeout = 0 if options['no_page_cache'] else settings.PAGE_CACHE_TIMEOUT
+        with benchmark_database(), override_settings(PAGE_CACHE_TIMEOUT=timeout):
+            seed_articles(options['articles'])
+            samples, elapsed = MODES[options['mode']](options['paths'] or PUBLIC_PATHS, options['requests'],
+                                                      options['concurrency'])
+        return summarize(samples, elapsed)
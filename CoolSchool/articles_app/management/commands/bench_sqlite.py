@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from articles_app.benchmarks import benchmark_database, run_mixed_load, seed_articles, summarize
+
+
+class Command(BaseCommand):
+    help = ('Runs concurrent listing reads against article writes on a throwaway SQLite file, '
+            'once per SQLite profile, and reports throughput, latency and "database is locked" errors.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile.')
+        parser.add_argument('--articles', type=int, default=500, help='Articles seeded per page.')
+        parser.add_argument('--conn-max-age', type=int, default=settings.DATABASES['default'].get('CONN_MAX_AGE', 0),
+                            help='0 reconnects after every operation, like CONN_MAX_AGE=0 does per request.')
+        parser.add_argument('--profile', action='append', dest='profiles', choices=settings.SQLITE_PROFILES,
+                            help='Profile from settings.SQLITE_PROFILES; can be repeated. Defaults to all.')
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('bench_sqlite only applies to the SQLite backend.')
+        self.stdout.write(f"{'profile':12} {'kind':6} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} "
+                          f"{'p99 ms':>10} {'locked':>8}")
+        for profile in options['profiles'] or settings.SQLITE_PROFILES:
+            with override_settings(SQLITE_PRAGMAS=settings.SQLITE_PROFILES[profile]), benchmark_database():
+                seed_articles(options['articles'])
+                results, elapsed = run_mixed_load(options['readers'], options['writers'], options['duration'],
+                                                  options['conn_max_age'])
+            for kind, samples in results.items():
+                result = summarize(samples, elapsed)
+                self.stdout.write(f"{profile:12} {kind:6} {result['req_per_s']:10.1f} {result['p50_ms']:10.2f} "
+                                  f"{result['p95_ms']:10.2f} {result['p99_ms']:10.2f} {result['errors']:8}")
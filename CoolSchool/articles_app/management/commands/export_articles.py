@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles_app.transfer import FORMATS, export_lines, parse_timestamp
+
+
+class Command(BaseCommand):
+    help = 'Streams every article, or those changed since a timestamp, as NDJSON or CSV for import_articles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--since', help='Only articles changed after this ISO 8601 timestamp.')
+        parser.add_argument('--output', '-o', help='File to write to, defaults to stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_timestamp(options['since']) if options['since'] else None
+        except ValueError as e:
+            raise CommandError(e)
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        try:
+            for line in export_lines(options['format'], since):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles_app.transfer import BATCH_SIZE, FORMATS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Creates or updates articles from an export_articles NDJSON or CSV file in bulk batches, '
+            'resolving pages by title.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        import_format = options['format'] or Path(options['file']).suffix.lstrip('.')
+        if import_format not in FORMATS:
+            raise CommandError(f'Unknown format {import_format!r}; use --format {" or ".join(FORMATS)}.')
+        with open(options['file'], encoding='utf-8', newline='') as file:
+            try:
+                created, updated = import_rows(read_rows(file, import_format), options['batch_size'])
+            except (ValueError, KeyError) as e:
+                raise CommandError(f'Import failed, nothing was saved: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Created {created} and updated {updated} article(s).'))
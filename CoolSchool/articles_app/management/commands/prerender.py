@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404
+
+from articles_app.prerender import prerender_pages
+
+
+class Command(BaseCommand):
+    help = 'Writes every public page to static HTML files that a front server can serve directly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Target directory, defaults to settings.PRERENDER_ROOT.')
+        parser.add_argument('--page', action='append', dest='pages', metavar='TITLE',
+                            help='Only render the page with this title; can be repeated.')
+
+    def handle(self, *args, **options):
+        try:
+            written = prerender_pages(options['pages'], options['output'])
+        except (Resolver404, ValueError) as e:
+            raise CommandError(f'Cannot prerender page: {e}')
+        for file in written:
+            self.stdout.write(f'Wrote {file}')
+        self.stdout.write(self.style.SUCCESS(f'Prerendered {len(written)} page(s).'))
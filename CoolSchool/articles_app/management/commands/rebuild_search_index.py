@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from articles_app.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = ('Refills the full-text search index from every article, e.g. after bulk imports '
+            'that bypassed the save signals.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('The full-text search index needs SQLite with FTS5; other databases search directly.')
+        count = rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} article(s).'))
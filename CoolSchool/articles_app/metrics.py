@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from .prerender import write_atomically
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+METRICS = {
+    'coolschool_requests_total': ('counter', 'Requests handled, by URL name, method and status.'),
+    'coolschool_page_cache_total': ('counter', 'Public page response cache lookups, by URL name and result.'),
+    'coolschool_request_duration_seconds': ('histogram', 'Time spent handling requests, by URL name.'),
+    'coolschool_response_size_bytes': ('histogram', 'Response body sizes, by URL name.'),
+}
+
+
+class ProcessMetrics:
+    """Counters and histograms of this process, flushed to <METRICS_DIR>/<pid>.json for /metrics to merge."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # A worker forked from a preloaded master starts from zero instead of re-reporting the master's samples.
+        self.pid = os.getpid()
+        self.counters = {}
+        self.histograms = {}
+        self.flushed_at = 0.0
+
+    def check_pid(self):
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.setdefault(key, {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                histogram['buckets'][index] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+    def record_request(self, view, method, status, duration, size, page_cache):
+        with self.lock:
+            self.check_pid()
+            self.inc('coolschool_requests_total', {'view': view, 'method': method, 'status': str(status)})
+            self.observe('coolschool_request_duration_seconds', {'view': view}, duration, LATENCY_BUCKETS)
+            if size is not None:
+                self.observe('coolschool_response_size_bytes', {'view': view}, size, SIZE_BUCKETS)
+            if page_cache is not None:
+                self.inc('coolschool_page_cache_total', {'view': view, 'result': page_cache})
+            if time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+                self.flush()
+
+    def flush(self):
+        """Write this process's totals; called with self.lock held."""
+        data = {
+            'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+            'histograms': [[name, labels, histogram] for (name, labels), histogram in self.histograms.items()],
+        }
+        write_atomically(Path(settings.METRICS_DIR) / f'{self.pid}.json', json.dumps(data).encode())
+        self.flushed_at = time.monotonic()
+
+
+process_metrics = ProcessMetrics()
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """Sum the totals of every live process that has written to METRICS_DIR, this one included.
+
+    Files of exited workers are deleted: each restart would otherwise leave one counted forever.
+    Their counters drop out of the sums, which Prometheus treats as a counter reset.
+    """
+    with process_metrics.lock:
+        process_metrics.check_pid()
+        process_metrics.flush()
+    counters, histograms = {}, {}
+    for file in Path(settings.METRICS_DIR).glob('*.json'):
+        if file.stem.isdigit() and not is_running(int(file.stem)):
+            file.unlink(missing_ok=True)
+            continue
+        try:
+            data = json.loads(file.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in data['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, histogram in data['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, {'buckets': [0] * len(histogram['buckets']), 'sum': 0.0, 'count': 0})
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], histogram['buckets'])]
+            total['sum'] += histogram['sum']
+            total['count'] += histogram['count']
+    return counters, histograms
+
+
+def format_labels(labels):
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+def render_prometheus():
+    counters, histograms = collect()
+    lines = []
+    for metric, (metric_type, help_text) in METRICS.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {metric_type}']
+        if metric_type == 'counter':
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f'{metric}{format_labels(labels)} {value}')
+            continue
+        buckets = LATENCY_BUCKETS if metric == 'coolschool_request_duration_seconds' else SIZE_BUCKETS
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name != metric:
+                continue
+            for bound, count in zip(buckets, histogram['buckets']):
+                lines.append(f'{metric}_bucket{format_labels(labels + (("le", f"{bound:g}"),))} {count}')
+            lines.append(f'{metric}_bucket{format_labels(labels + (("le", "+Inf"),))} {histogram["count"]}')
+            lines.append(f'{metric}_sum{format_labels(labels)} {histogram["sum"]:g}')
+            lines.append(f'{metric}_count{format_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def view_label(request, response):
+    match = getattr(request, 'resolver_match', None)
+    # Only articles_app's own routes get a label of their own, keeping label cardinality bounded.
+    if match is None or match.namespace or not match.url_name:
+        return 'other'
+    # Generic page routes are labelled per page; unknown slugs 404 and share the route's label.
+    if 'slug' in match.kwargs and response.status_code != 404:
+        return f'{match.url_name}:{match.kwargs["slug"]}'
+    return match.url_name
+
+
+def response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    return int(response['Content-Length']) if response.has_header('Content-Length') else None
@@ -0,0 +1,84 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import process_metrics, response_size, view_label
+from .timing import Timings, current_timings
+
+logger = logging.getLogger('articles_app.timing')
+
+
+class SyncAndAsyncMiddleware:
+    """Calls start(request) before and finish(request, response, state) after the view, under WSGI and ASGI alike."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(state)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(state)
+        return self.finish(request, response, state)
+
+    def start(self, request):
+        return None
+
+    def stop(self, state):
+        pass
+
+    def finish(self, request, response, state):
+        return response
+
+
+class ServerTimingMiddleware(SyncAndAsyncMiddleware):
+    """Reports SQL, template render and total time of each request in a Server-Timing header and logs slow requests."""
+
+    def start(self, request):
+        timings = Timings()
+        return timings, current_timings.set(timings)
+
+    def stop(self, state):
+        current_timings.reset(state[1])
+
+    def finish(self, request, response, state):
+        timings = state[0]
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = timings.server_timing()
+        threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+        if threshold is not None and timings.total * 1000 >= threshold:
+            logger.warning('Slow request %s %s -> %s: %.1f ms total, %d queries in %.1f ms, render %.1f ms',
+                           request.method, request.path, response.status_code, timings.total * 1000,
+                           timings.queries, timings.sql * 1000, timings.render * 1000)
+        return response
+
+
+class MetricsMiddleware(SyncAndAsyncMiddleware):
+    """Counts requests, latency, response size and page cache hits per URL name for the /metrics endpoint."""
+
+    def start(self, request):
+        return time.perf_counter()
+
+    def finish(self, request, response, state):
+        process_metrics.record_request(view_label(request, response), request.method, response.status_code,
+                                       time.perf_counter() - state, response_size(response),
+                                       getattr(request, 'page_cache', None))
+        return response
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:54
+
+from django.db import migrations, models
+
+
+def merge_duplicate_pages(apps, schema_editor):
+    Page = apps.get_model('articles_app', 'Page')
+    Article = apps.get_model('articles_app', 'Article')
+    kept_pages = {}
+    for page in Page.objects.order_by('id'):
+        if page.title not in kept_pages:
+            kept_pages[page.title] = page
+            continue
+        Article.objects.filter(page=page).update(page=kept_pages[page.title])
+        page.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles_app', '0007_article_show_on_whiteboard'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_pages, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='page',
+            name='title',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['page', '-pub_date'], name='article_page_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('show_on_whiteboard', True)), fields=['page', '-pub_date'], name='article_whiteboard_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+from articles_app.content import process_content
+
+
+def forward_func(apps, schema_editor):
+    Article = apps.get_model('articles_app', 'Article')
+    articles = list(Article.objects.all())
+    for article in articles:
+        for field, value in process_content(article.content).items():
+            setattr(article, field, value)
+    Article.objects.bulk_update(articles, ['content_html', 'excerpt', 'word_count', 'reading_time'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles_app', '0009_page_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='reading time in minutes'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(forward_func, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+from articles_app.content import plain_text
+
+FTS_TABLE = 'articles_app_article_fts'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Article = apps.get_model('articles_app', 'Article')
+    schema_editor.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, body, "
+                          f"tokenize='unicode61 remove_diacritics 2')")
+    rows = [(article.id, article.title, plain_text(article.content_html))
+            for article in Article.objects.only('id', 'title', 'content_html')]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles_app', '0010_article_derived_content'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
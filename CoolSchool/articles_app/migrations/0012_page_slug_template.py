@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.utils.text import slugify
+
+import articles_app.models
+
+CONTACT_PAGE_NAME = 'Kontakt'
+
+
+def forward_func(apps, schema_editor):
+    Page = apps.get_model('articles_app', 'Page')
+    for page in Page.objects.all():
+        # The editor URLs already name every page: /add_article/<slug>/.
+        page.slug = page.edit_url.strip('/').split('/')[-1] if page.edit_url else slugify(page.title)
+        page.template = 'contact.html' if page.title == CONTACT_PAGE_NAME else 'index.html'
+        page.save(update_fields=['slug', 'template'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles_app', '0011_article_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='slug',
+            field=models.SlugField(max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='template',
+            field=models.CharField(choices=[('index.html', 'Artykuły'), ('contact.html', 'Kontakt z mapą')],
+                                   default='index.html', max_length=100),
+        ),
+        migrations.RunPython(forward_func, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='page',
+            name='slug',
+            field=models.SlugField(max_length=100, unique=True, validators=[articles_app.models.validate_page_slug]),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles_app', '0012_page_slug_template'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['updated_at', 'id'], name='article_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.5 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles_app', '0013_article_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='article',
+            name='article_page_pub_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='article_whiteboard_idx',
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['page', '-pub_date', '-id'], name='article_page_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('show_on_whiteboard', True)), fields=['page', '-pub_date', '-id'], name='article_whiteboard_newest_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from articles_app.content import process_content
+
+DERIVED_TEXT_FIELDS = ['excerpt', 'word_count', 'reading_time']
+
+
+def forward_func(apps, schema_editor):
+    # HTML5 blocks such as <figcaption> now separate words; recount what 0010 stored.
+    Article = apps.get_model('articles_app', 'Article')
+    articles = list(Article.objects.only('id', 'content'))
+    for article in articles:
+        derived = process_content(article.content)
+        for field in DERIVED_TEXT_FIELDS:
+            setattr(article, field, derived[field])
+    Article.objects.bulk_update(articles, DERIVED_TEXT_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles_app', '0014_article_listing_id_order'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward_func, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,56 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+from django.utils.text import slugify
 from ckeditor.fields import RichTextField
 
+from .content import process_content
+
+MAIN_PAGE_SLUG = 'main'
+MAIN_PAGE_NAME = 'Główna'
+NEWS_PAGE_NAME = 'Aktualności'
+PAGE_TEMPLATES = [('index.html', 'Artykuły'), ('contact.html', 'Kontakt z mapą')]
+
+
+def validate_page_slug(slug):
+    # Fixed routes come before the generic page route, so a page with one of their prefixes would be unreachable.
+    from .navigation import reserved_slugs
+    if slug in reserved_slugs():
+        raise ValidationError(f'"{slug}" is already used by another address.')
+
+
 class Page(models.Model):
-    title = models.CharField(max_length=100)
+    title = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(max_length=100, unique=True, validators=[validate_page_slug])
+    template = models.CharField(max_length=100, choices=PAGE_TEMPLATES, default='index.html')
     page_url = models.URLField(max_length=200, blank=True, null=True)
     edit_url = models.URLField(max_length=200, blank=True, null=True)
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            # Pages created with only an editor URL keep its last segment as their slug, as migration 0012 did.
+            self.slug = self.edit_url.strip('/').split('/')[-1] if self.edit_url else slugify(self.title)
+        # The nav, prerendering and editor links read these, so they follow the slug when it is renamed.
+        self.page_url = '' if self.slug == MAIN_PAGE_SLUG else f'{self.slug}/'
+        self.edit_url = f'/add_article/{self.slug}/'
+        super().save(*args, **kwargs)
+
+
+class ArticleQuerySet(models.QuerySet):
+    def newest_first(self):
+        return self.order_by('-pub_date', '-id')
+
+    def for_page(self, page_name):
+        return self.filter(page__title=page_name).newest_first()
+
+    def on_whiteboard(self, page_name=NEWS_PAGE_NAME):
+        return self.for_page(page_name).filter(show_on_whiteboard=True)
+
+    def published(self, now=None):
+        """Articles whose pub_date has come; later ones are scheduled and hidden from visitors."""
+        return self.filter(pub_date__lte=now or timezone.now())
 
 
 # Create your models here.
@@ -14,3 +60,41 @@ class Article(models.Model):
     pub_date = models.DateTimeField('date published')
     page = models.ForeignKey(Page, on_delete=models.CASCADE, null=True)
     show_on_whiteboard = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField('reading time in minutes', default=0, editable=False)
+
+    objects = ArticleQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_show_on_whiteboard = instance.__dict__.get('show_on_whiteboard', False)
+        instance.loaded_page_id = instance.__dict__.get('page_id')
+        return instance
+
+    @property
+    def is_published(self):
+        return self.pub_date <= timezone.now()
+
+    def process_content(self):
+        for field, value in process_content(self.content).items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        self.process_content()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'content_html', 'excerpt', 'word_count', 'reading_time'}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Match newest_first() in full, so keyset pages are read from the index without a sort.
+            models.Index(fields=['page', '-pub_date', '-id'], name='article_page_newest_idx'),
+            models.Index(fields=['page', '-pub_date', '-id'], name='article_whiteboard_newest_idx',
+                         condition=models.Q(show_on_whiteboard=True)),
+            models.Index(fields=['updated_at', 'id'], name='article_updated_at_idx'),
+        ]
@@ -0,0 +1,75 @@
+from collections import namedtuple
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.http import Http404
+from django.urls import get_resolver
+
+from .models import MAIN_PAGE_SLUG, Page
+
+NAV_GENERATION_KEY = 'articles_app:nav_generation'
+
+PageEntry = namedtuple('PageEntry', ['id', 'title', 'slug', 'url', 'edit_url', 'template'])
+
+# (generation, {slug: PageEntry}, nav items) of this process; rebuilt when a Page write bumps the shared generation.
+_pages = (None, {}, [])
+
+
+def bump_nav_generation():
+    generation = uuid4().hex
+    cache.set(NAV_GENERATION_KEY, generation, None)
+    return generation
+
+
+def build_page_map():
+    return {page.slug: PageEntry(page.id, page.title, page.slug, f'/{page.page_url or ""}', page.edit_url,
+                                 page.template)
+            for page in Page.objects.order_by('id')}
+
+
+def build_nav_items(page_map):
+    return [(entry.title, entry.url) for entry in page_map.values() if entry.slug != MAIN_PAGE_SLUG]
+
+
+def current_pages():
+    global _pages
+    generation = cache.get(NAV_GENERATION_KEY)
+    if generation is None:
+        generation = bump_nav_generation()
+    if _pages[0] != generation:
+        page_map = build_page_map()
+        _pages = (generation, page_map, build_nav_items(page_map))
+    return _pages
+
+
+def get_page_map():
+    return current_pages()[1]
+
+
+def get_page(slug):
+    entry = get_page_map().get(slug)
+    if entry is None:
+        raise Http404('No such page')
+    return entry
+
+
+def get_nav_items():
+    return current_pages()[2]
+
+
+def reserved_slugs():
+    """Literal first path segments of the project's fixed routes, which a page slug would be shadowed by."""
+    slugs = set()
+
+    def collect(patterns):
+        for pattern in patterns:
+            route = str(pattern.pattern).lstrip('^')
+            if not route and hasattr(pattern, 'url_patterns'):
+                collect(pattern.url_patterns)
+                continue
+            first_segment = route.split('/')[0]
+            if first_segment and not set(first_segment) & set('<(\\[.$'):
+                slugs.add(first_segment)
+
+    collect(get_resolver().url_patterns)
+    return slugs
@@ -0,0 +1,65 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_PARAM = 'after'
+CURSOR_SEPARATOR = '_'
+
+
+def encode_cursor(article):
+    return f'{article.pub_date.isoformat()}{CURSOR_SEPARATOR}{article.id}'
+
+
+def decode_cursor(cursor):
+    pub_date, _, article_id = (cursor or '').rpartition(CURSOR_SEPARATOR)
+    try:
+        pub_date = parse_datetime(pub_date)
+        article_id = int(article_id)
+    except ValueError:
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, article_id
+
+
+def after_cursor(queryset, cursor):
+    position = decode_cursor(cursor)
+    if position is None:
+        return queryset
+    pub_date, article_id = position
+    return queryset.filter(Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=article_id))
+
+
+def split_page(articles, page_size):
+    next_cursor = encode_cursor(articles[page_size - 1]) if len(articles) > page_size else None
+    return articles[:page_size], next_cursor
+
+
+def keyset_page(queryset, cursor=None, page_size=None):
+    """Return (articles, next_cursor) for a queryset ordered newest first by (pub_date, id)."""
+    page_size = page_size or settings.ARTICLES_PAGE_SIZE
+    articles = list(after_cursor(queryset, cursor)[:page_size + 1])
+    return split_page(articles, page_size)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=None):
+    page_size = page_size or settings.ARTICLES_PAGE_SIZE
+    articles = [article async for article in after_cursor(queryset, cursor)[:page_size + 1]]
+    return split_page(articles, page_size)
+
+
+def page_context(request, articles, next_cursor):
+    next_page_url = None
+    if next_cursor is not None:
+        next_page_url = f'{request.path}?{urlencode({CURSOR_PARAM: next_cursor})}'
+    return {'articles': articles, 'next_page_url': next_page_url}
+
+
+def paginate_articles(request, queryset):
+    return page_context(request, *keyset_page(queryset, request.GET.get(CURSOR_PARAM)))
+
+
+async def apaginate_articles(request, queryset):
+    return page_context(request, *await akeyset_page(queryset, request.GET.get(CURSOR_PARAM)))
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.models import Min
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+
+from .cache import shown_articles
+from .models import Page
+
+# Page title -> threading.Timer rewriting it when its next scheduled article goes live.
+_timers = {}
+_timers_lock = threading.Lock()
+
+
+def public_page_paths(page_names=None):
+    pages = Page.objects.order_by('id')
+    if page_names is not None:
+        pages = pages.filter(title__in=page_names)
+    return {page.title: f'/{page.page_url or ""}' for page in pages}
+
+
+def output_file(root, path):
+    return Path(root) / path.strip('/') / 'index.html'
+
+
+def render_public_page(path):
+    # Addressed to the public site, so the host is allowed and any absolute links point at it.
+    site = urlsplit(settings.SITE_URL)
+    request = RequestFactory().get(path, HTTP_HOST=site.netloc, secure=site.scheme == 'https')
+    request.user = AnonymousUser()
+    match = resolve(path)
+    # Under ASYNC_PUBLIC_VIEWS the public routes resolve to the async views.
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    response = view(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise ValueError(f'{path} returned {response.status_code}')
+    return response.content
+
+
+def write_atomically(file, content):
+    file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=file.parent, prefix='.', suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp:
+        tmp.write(content)
+    os.chmod(tmp_name, 0o644)
+    os.replace(tmp_name, file)
+
+
+def prerender_pages(page_names=None, root=None):
+    root = root or settings.PRERENDER_ROOT
+    written = []
+    for path in public_page_paths(page_names).values():
+        file = output_file(root, path)
+        write_atomically(file, render_public_page(path))
+        written.append(file)
+    return written
+
+
+def next_publish_time(page_name):
+    return shown_articles(page_name).filter(pub_date__gt=timezone.now()).aggregate(
+        next_publish=Min('pub_date'))['next_publish']
+
+
+def schedule_prerender(page_names=None):
+    """Rewrite each page again when its next scheduled article goes live; no save marks that moment."""
+    for page_name in public_page_paths(page_names):
+        next_publish = next_publish_time(page_name)
+        with _timers_lock:
+            previous = _timers.pop(page_name, None)
+            if previous is not None:
+                previous.cancel()
+            if next_publish is None:
+                continue
+            delay = max((next_publish - timezone.now()).total_seconds(), 0)
+            timer = threading.Timer(delay, run_scheduled_prerender, [page_name])
+            timer.daemon = True
+            _timers[page_name] = timer
+            timer.start()
+
+
+def refresh_prerendered(page_names=None):
+    prerender_pages(page_names)
+    schedule_prerender(page_names)
+
+
+def run_scheduled_prerender(page_name):
+    try:
+        refresh_prerendered([page_name])
+    finally:
+        connections.close_all()
@@ -0,0 +1,101 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .content import plain_text
+from .models import Article, Page
+
+FTS_TABLE = 'articles_app_article_fts'
+SEARCH_RESULTS = 20
+SNIPPET_WORDS = 24
+# bm25 column weights: a hit in the title counts ten times as much as one in the body.
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+TOKEN_RE = re.compile(r'\w+')
+# Control characters cannot occur in the indexed text, so they mark matches safely until the snippet is escaped.
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_query(query):
+    """Prefix-match every word of the visitor's query; quoting keeps FTS5 operators out of it."""
+    tokens = TOKEN_RE.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens) or None
+
+
+def index_articles(articles):
+    rows = [[article.pk, article.title, plain_text(article.content_html)] for article in articles]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [[row[0]] for row in rows])
+        cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+
+
+def index_article(article):
+    index_articles([article])
+
+
+def unindex_article(article_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article_id])
+
+
+def rebuild_index(batch_size=500):
+    articles = Article.objects.only('id', 'title', 'content_html').order_by('id').iterator(chunk_size=batch_size)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    count = 0
+    batch = []
+    for article in articles:
+        batch.append(article)
+        if len(batch) == batch_size:
+            index_articles(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        index_articles(batch)
+        count += len(batch)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return count
+
+
+def highlighted(snippet):
+    return mark_safe(escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>'))
+
+
+def search_articles(query, limit=SEARCH_RESULTS):
+    """Return [{'id', 'title', 'page_url', 'snippet'}] best match first."""
+    fts_query = match_query(query)
+    if fts_query is None:
+        return []
+    if not fts_available():
+        return fallback_search(query, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT article.id, article.title, page.page_url, '
+            f"snippet({FTS_TABLE}, 1, '{MATCH_START}', '{MATCH_END}', '…', {SNIPPET_WORDS}) "
+            f'FROM {FTS_TABLE} '
+            f'JOIN {Article._meta.db_table} article ON article.id = {FTS_TABLE}.rowid '
+            f'LEFT JOIN {Page._meta.db_table} page ON page.id = article.page_id '
+            f'WHERE {FTS_TABLE} MATCH %s AND article.pub_date <= %s '
+            f'ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) LIMIT %s',
+            [fts_query, connection.ops.adapt_datetimefield_value(timezone.now()), limit])
+        rows = cursor.fetchall()
+    return [{'id': id, 'title': title, 'page_url': page_url, 'snippet': highlighted(snippet)}
+            for id, title, page_url, snippet in rows]
+
+
+def fallback_search(query, limit):
+    # Other databases have no FTS5 table; every word must appear in the title or the body.
+    condition = Q()
+    for token in TOKEN_RE.findall(query):
+        condition &= Q(title__icontains=token) | Q(content_html__icontains=token)
+    articles = Article.objects.published().filter(condition).select_related('page').newest_first()[:limit]
+    return [{'id': article.id, 'title': article.title, 'page_url': article.page.page_url if article.page else None,
+             'snippet': escape(article.excerpt)} for article in articles]
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_all_pages, invalidate_page
+from .models import MAIN_PAGE_NAME, NEWS_PAGE_NAME, Article, Page
+from .navigation import bump_nav_generation
+from .prerender import refresh_prerendered
+from .search import fts_available, index_article, unindex_article
+from .whiteboard import whiteboard_changed
+
+
+def affected_page_names(article):
+    # An article moved to another page also leaves the one it was loaded from.
+    page_ids = {article.page_id, getattr(article, 'loaded_page_id', None)} - {None}
+    page_names = list(Page.objects.filter(id__in=page_ids).order_by('id').values_list('title', flat=True))
+    on_whiteboard = article.show_on_whiteboard or getattr(article, 'loaded_show_on_whiteboard', False)
+    if NEWS_PAGE_NAME in page_names and on_whiteboard:
+        page_names.append(MAIN_PAGE_NAME)
+    return page_names
+
+
+def bump_page_versions(pages):
+    pages.update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def pages_changed(page_names):
+    """New versions of these pages: bump their ETags, drop their cached responses and re-prerender them."""
+    bump_page_versions(Page.objects.filter(title__in=page_names))
+    # Another worker may re-cache the old rows before the write commits, so drop the entries again afterwards.
+    invalidate_page(*page_names)
+    transaction.on_commit(lambda: invalidate_page(*page_names))
+    if settings.PRERENDER_ON_SAVE:
+        transaction.on_commit(lambda: refresh_prerendered(page_names))
+
+
+@receiver([post_save, post_delete], sender=Article)
+def invalidate_article_pages(sender, instance, **kwargs):
+    page_names = affected_page_names(instance)
+    pages_changed(page_names)
+    if MAIN_PAGE_NAME in page_names:
+        whiteboard_changed()
+    instance.loaded_show_on_whiteboard = instance.show_on_whiteboard
+    instance.loaded_page_id = instance.page_id
+
+
+@receiver(post_save, sender=Article)
+def index_saved_article(sender, instance, **kwargs):
+    if fts_available():
+        index_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def unindex_deleted_article(sender, instance, **kwargs):
+    if fts_available():
+        unindex_article(instance.pk)
+
+
+def nav_changed():
+    bump_nav_generation()
+    invalidate_all_pages()
+
+
+@receiver([post_save, post_delete], sender=Page)
+def invalidate_pages(sender, instance, **kwargs):
+    # Every page renders the nav, so a Page change is a new version of all of them.
+    bump_page_versions(Page.objects.all())
+    invalidate_all_pages()
+    # Workers rebuild the nav when the generation moves, so it may only move once the new rows are visible.
+    transaction.on_commit(nav_changed)
+    if settings.PRERENDER_ON_SAVE:
+        transaction.on_commit(refresh_prerendered)
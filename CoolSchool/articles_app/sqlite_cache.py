@@ -0,0 +1,215 @@
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, '
+    'expires REAL, accessed REAL NOT NULL) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed_idx ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires_idx ON cache (expires)',
+    # Running totals, so checking the limits on every write doesn't aggregate the whole table.
+    'CREATE TABLE IF NOT EXISTS cache_stats (id INTEGER PRIMARY KEY CHECK (id = 0), count INTEGER NOT NULL, '
+    'size INTEGER NOT NULL)',
+    'CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache BEGIN '
+    'UPDATE cache_stats SET count = count + 1, size = size + new.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache BEGIN '
+    'UPDATE cache_stats SET count = count - 1, size = size - old.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_resized AFTER UPDATE OF size ON cache BEGIN '
+    'UPDATE cache_stats SET size = size - old.size + new.size; END',
+)
+# Reads only write back their access time once it is this stale, so hot keys don't serialize readers.
+ACCESS_RESOLUTION = 1.0
+
+
+class SQLiteCache(BaseCache):
+    """Cache shared by every process on the host through a WAL-mode SQLite file at LOCATION.
+
+    Entries are evicted least recently used first once there are more than MAX_ENTRIES of them or
+    their pickled values take more than OPTIONS['MAX_SIZE'] bytes. Each thread of each process
+    opens its own connection; a worker forked from a preloaded master reconnects on first use.
+    Without a KEY_PREFIX, keys are prefixed with a digest of the directories in OPTIONS['KEY_SOURCES'].
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = str(location)
+        self.max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self.busy_timeout = float(options.get('BUSY_TIMEOUT', 5.0))
+        self.local = threading.local()
+        if not self.key_prefix and options.get('KEY_SOURCES'):
+            self.key_prefix = deployed_digest(tuple(options['KEY_SOURCES']))
+
+    @property
+    def connection(self):
+        if getattr(self.local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            with Transaction(connection):
+                for statement in SCHEMA:
+                    connection.execute(statement)
+                # Files written before the totals existed start from a single count.
+                if connection.execute('SELECT 1 FROM cache_stats').fetchone() is None:
+                    connection.execute('INSERT INTO cache_stats SELECT 0, count(*), total(size) FROM cache')
+            self.local.pid, self.local.connection = os.getpid(), connection
+        return self.local.connection
+
+    def disconnect(self):
+        """Close this thread's connection, e.g. in a preloading master before it forks its workers.
+
+        Not close(): Django calls that after every request, and connections are meant to persist.
+        """
+        if getattr(self.local, 'pid', None) == os.getpid():
+            self.local.connection.close()
+        self.local.__dict__.clear()
+
+    def write(self):
+        """Transaction taking the write lock up front, so concurrent writers wait instead of failing."""
+        return Transaction(self.connection)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        rows = self.connection.execute(
+            f'SELECT key, value, accessed FROM cache WHERE key IN ({", ".join("?" * len(keys))}) '
+            'AND (expires IS NULL OR expires > ?)', [*keys, now]).fetchall()
+        stale = [(now, key) for key, value, accessed in rows if accessed < now - ACCESS_RESOLUTION]
+        if stale:
+            with self.write() as connection:
+                connection.executemany('UPDATE cache SET accessed = ? WHERE key = ?', stale)
+        return {keys[key]: pickle.loads(value) for key, value, accessed in rows}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.connection.execute('SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                                       [key, time.time()]).fetchone() is not None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        rows = [self.row(key, value, timeout, version) for key, value in data.items()]
+        with self.write() as connection:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete would bypass the totals' trigger.
+            connection.executemany(
+                'INSERT INTO cache VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+                'size = excluded.size, expires = excluded.expires, accessed = excluded.accessed', rows)
+            self.cull(connection)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        row = self.row(key, value, timeout, version)
+        with self.write() as connection:
+            connection.execute('DELETE FROM cache WHERE key = ? AND expires <= ?', [row[0], row[4]])
+            added = connection.execute('INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?)', row).rowcount == 1
+            if added:
+                self.cull(connection)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self.write() as connection:
+            return connection.execute(
+                'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                [self.get_backend_timeout(timeout), now, key, now]).rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self.write() as connection:
+            row = connection.execute('SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                                     [key, time.time()]).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute('UPDATE cache SET value = ?, size = ? WHERE key = ?', [pickled, len(pickled), key])
+        return value
+
+    def delete(self, key, version=None):
+        return self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return False
+        with self.write() as connection:
+            return connection.execute(f'DELETE FROM cache WHERE key IN ({", ".join("?" * len(keys))})',
+                                      keys).rowcount > 0
+
+    def clear(self):
+        with self.write() as connection:
+            connection.execute('DELETE FROM cache')
+
+    def row(self, key, value, timeout, version):
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        key = self.make_and_validate_key(key, version=version)
+        return key, value, len(value), self.get_backend_timeout(timeout), time.time()
+
+    def cull(self, connection):
+        """Drop expired entries, then the least recently used ones until both limits hold again."""
+        count, size = connection.execute('SELECT count, size FROM cache_stats').fetchone()
+        if count <= self._max_entries and size <= self.max_size:
+            return
+        connection.execute('DELETE FROM cache WHERE expires <= ?', [time.time()])
+        count, size = connection.execute('SELECT count, size FROM cache_stats').fetchone()
+        if count > self._max_entries:
+            # Like Django's own backends, cull a 1/CULL_FREQUENCY slice at once rather than one entry per set.
+            excess = count - self._max_entries + self._max_entries // max(self._cull_frequency, 1)
+            connection.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                               [excess])
+            size = connection.execute('SELECT size FROM cache_stats').fetchone()[0]
+        if size > self.max_size:
+            excess = size - self.max_size + self.max_size // max(self._cull_frequency, 1)
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM (SELECT key, size, '
+                'sum(size) OVER (ORDER BY accessed, key) AS freed FROM cache) WHERE freed - size < ?)', [excess])
+
+
+def source_digest(*directories):
+    digest = hashlib.sha256()
+    for directory in directories:
+        for path in sorted(Path(directory).rglob('*')):
+            if path.is_file() and '__pycache__' not in path.parts:
+                digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+@functools.lru_cache
+def deployed_digest(directories):
+    # Backends are created per thread, but the deployed sources don't change under a running process.
+    return source_digest(*directories)
+
+
+def scratch_caches(directory):
+    """CACHES with every SQLiteCache moved into directory, for runs that must not touch the site's shared file."""
+    return {alias: {**config, 'LOCATION': os.path.join(directory, f'{alias}.sqlite3')}
+            if config['BACKEND'] == f'{__name__}.SQLiteCache' else config
+            for alias, config in settings.CACHES.items()}
+
+
+class Transaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,37 @@
+// Editor listings render titles only; an article's body is fetched the first time it is expanded.
+function toggleArticleBody(button) {
+    var article = button.closest('article');
+    var body = article.querySelector('.article_body');
+    if (!body.hidden) {
+        body.hidden = true;
+        button.textContent = 'Pokaż treść';
+        return;
+    }
+    var show = function () {
+        body.hidden = false;
+        button.textContent = 'Ukryj treść';
+    };
+    if (body.dataset.loaded) {
+        show();
+        return;
+    }
+    button.disabled = true;
+    fetch(article.dataset.bodyUrl, {credentials: 'same-origin'})
+        .then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.json();
+        })
+        .then(function (data) {
+            body.innerHTML = data.content_html;
+            body.dataset.loaded = '1';
+            show();
+        })
+        .catch(function () {
+            alert('Nie udało się wczytać treści artykułu.');
+        })
+        .finally(function () {
+            button.disabled = false;
+        });
+}
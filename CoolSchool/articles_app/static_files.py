@@ -0,0 +1,155 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Precompressed siblings written by CompressedManifestStaticFilesStorage, in order of preference.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# (manifest, its hashed names); recomputed when the storage loads a different manifest.
+_immutable_names = (None, frozenset())
+
+
+def immutable_names():
+    global _immutable_names
+    hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+    if _immutable_names[0] is not hashed_files:
+        _immutable_names = (hashed_files, frozenset(hashed_files.values()))
+    return _immutable_names[1]
+
+
+def is_immutable(path):
+    return path in immutable_names()
+
+
+def patch_static_cache_control(response, path):
+    if is_immutable(path):
+        patch_cache_control(response, public=True, max_age=settings.STATIC_IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.STATIC_MAX_AGE)
+    return response
+
+
+class FileRange:
+    """Part of an open file; keeps fileno() so the WSGI server can still sendfile() it from the current offset."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def file_stat(path):
+    try:
+        file_info = os.stat(path)
+    except OSError:
+        return None
+    return file_info if stat.S_ISREG(file_info.st_mode) else None
+
+
+def negotiate_encoding(request, full_path):
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for encoding, extension in ENCODINGS:
+        if re.search(rf'\b{encoding}\b', accept_encoding):
+            file_info = file_stat(full_path + extension)
+            if file_info is not None:
+                return encoding, full_path + extension, file_info
+    return None, full_path, None
+
+
+def parse_range(request, size, etag, last_modified):
+    """Return (start, length) of a satisfiable single byte range, None to send the whole file, or False for 416."""
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', ''))
+    if match is None:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            return False
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end - start + 1
+
+
+def serve_file(request, path, document_root):
+    try:
+        full_path = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404('File not found')
+    file_info = file_stat(full_path)
+    if file_info is None:
+        raise Http404('File not found')
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    encoding = None
+    if 'HTTP_RANGE' not in request.META:
+        encoding, serve_path, encoded_info = negotiate_encoding(request, full_path)
+        if encoding is not None:
+            full_path, file_info = serve_path, encoded_info
+    last_modified = int(file_info.st_mtime)
+    etag = f'"{file_info.st_mtime_ns:x}-{file_info.st_size:x}{"-" + encoding if encoding else ""}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = parse_range(request, file_info.st_size, etag, last_modified)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{file_info.st_size}'
+            return response
+        start, length = byte_range or (0, file_info.st_size)
+        file = FileRange(open(full_path, 'rb'), start, length)
+        response = FileResponse(file, status=206 if byte_range else 200, content_type=content_type)
+        response['Content-Length'] = length
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{start + length - 1}/{file_info.st_size}'
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+@require_safe
+def serve_static(request, path, document_root=None):
+    response = serve_file(request, path, document_root or settings.STATIC_ROOT)
+    return patch_static_cache_control(response, path)
+
+
+@require_safe
+def serve_media(request, path, document_root=None):
+    response = serve_file(request, path, document_root or settings.MEDIA_ROOT)
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
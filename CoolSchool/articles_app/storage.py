@@ -0,0 +1,67 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from .images import is_variant_source, schedule_variants
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class ImageVariantStorage(FileSystemStorage):
+    """Storage for CKEditor uploads that renders resized and WebP variants of each image in the background."""
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        if is_variant_source(name):
+            schedule_variants(name)
+        return name
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprints static files and writes .gz/.br siblings next to them at collectstatic time."""
+
+    compressible_extensions = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.map', '.ico', '.xml')
+    # Files collected before the manifest existed keep being served under their plain names.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        if self.hash_key(self.clean_name(name)) not in self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+        if dry_run:
+            return
+        for name in sorted(processed_names):
+            if name.endswith(self.compressible_extensions):
+                for compressed_name in self.compress(name):
+                    yield name, compressed_name, True
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for extension, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            compressed_name = name + extension
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield compressed_name
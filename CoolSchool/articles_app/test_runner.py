@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner as BaseDiscoverRunner
+
+from .sqlite_cache import scratch_caches
+
+
+class DiscoverRunner(BaseDiscoverRunner):
+    """Django's runner, with the shared cache file and METRICS_DIR swapped for scratch ones the tests may fill."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.scratch_directory = tempfile.TemporaryDirectory()
+        self.scratch_settings = override_settings(CACHES=scratch_caches(self.scratch_directory.name),
+                                                  METRICS_DIR=os.path.join(self.scratch_directory.name, 'metrics'))
+        self.scratch_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.scratch_settings.disable()
+        self.scratch_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
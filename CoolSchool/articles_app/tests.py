@@ -1,19 +1,67 @@
+import json
+import logging
+import os
+import subprocess
+import time
+import tempfile
+import threading
+import zoneinfo
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
 from random import randint
+from unittest import mock
 
+from django.conf import settings as active_settings
 from django.contrib import auth
-from django.contrib.auth.models import User
+from django.contrib.auth.models import AnonymousUser, User
 from django.contrib.staticfiles import finders
-from django.test import LiveServerTestCase, Client
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.models import Q
+from django.http import HttpResponse
+from django.test import (AsyncRequestFactory, LiveServerTestCase, Client, RequestFactory, TestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import ResolverMatch
 from django.utils import timezone
 from lxml import html
+from PIL import Image, ImageCms
 
-from CoolSchool import settings
+from CoolSchool import settings, wsgi
+from articles_app import async_views, images
+from articles_app.cache import cache_timeout, get_cached_response, invalidate_page, set_cached_response
 from articles_app.admin import admin_site
+from articles_app.db import apply_sqlite_pragmas
+from articles_app.metrics import process_metrics
+from articles_app.management.commands.bench import benchmark_routes, find_regressions
+from articles_app.navigation import get_nav_items, get_page
+from articles_app.prerender import public_page_paths, refresh_prerendered, render_public_page, run_scheduled_prerender
+from articles_app.search import search_articles
+from articles_app.sqlite_cache import SQLiteCache, scratch_caches, source_digest
+from articles_app.static_files import serve_static
+from articles_app.storage import ImageVariantStorage
+from articles_app.warmup import warm_up
+from articles_app.whiteboard import WHITEBOARD_KEY, get_whiteboard
 from .models import Page, Article
 
 
+@contextmanager
+def clock_moved_forward(seconds):
+    """Run as if seconds had passed, for both publication times and cache expiry, instead of sleeping."""
+    real_now, real_time = timezone.now, time.time
+    with mock.patch('django.utils.timezone.now', lambda: real_now() + timedelta(seconds=seconds)), \
+            mock.patch('time.time', lambda: real_time() + seconds):
+        yield
+
+
 class ArticlesAppTests(LiveServerTestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_superuser(
             username='admin',
             password='password',
@@ -231,3 +279,1063 @@ class ArticlesAppTests(LiveServerTestCase):
             articles = site_tree.xpath("//article/h1")
             articles = [article.text for article in articles]
             self.assertEqual(articles, ['Test Title2', 'Test Title1'], f'Articles are not in order on page {page.title}')
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+        self.courses = Page.objects.get(title='Kursy')
+        Article.objects.create(title='Cached Title', content='Cached Content', pub_date=timezone.now(),
+                               page=self.courses)
+
+    def test_second_anonymous_hit_is_served_without_queries(self):
+        self.client.get('/courses/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/courses/')
+        self.assertContains(response, 'Cached Title')
+
+    def test_article_save_invalidates_its_page(self):
+        self.client.get('/courses/')
+        Article.objects.create(title='Fresh Title', content='Fresh Content', pub_date=timezone.now(),
+                               page=self.courses)
+        self.assertContains(self.client.get('/courses/'), 'Fresh Title')
+
+    def test_news_article_delete_invalidates_index(self):
+        article = Article.objects.create(title='Whiteboard Title', content='Content', pub_date=timezone.now(),
+                                         page=self.news, show_on_whiteboard=True)
+        self.assertContains(self.client.get('/'), 'Whiteboard Title')
+        article.delete()
+        self.assertNotContains(self.client.get('/'), 'Whiteboard Title')
+
+    def test_moving_an_article_invalidates_both_pages(self):
+        old_etag = self.client.get('/courses/')['ETag']
+        self.client.get('/news/')
+        article = Article.objects.get(title='Cached Title')
+        article.page = self.news
+        article.save()
+        moved_from = self.client.get('/courses/')
+        self.assertNotContains(moved_from, 'Cached Title')
+        self.assertNotEqual(moved_from['ETag'], old_etag)
+        self.assertContains(self.client.get('/news/'), 'Cached Title')
+
+    def test_pages_cached_before_commit_are_dropped_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='Fresh Title', content='Fresh Content', pub_date=timezone.now(),
+                                   page=self.courses)
+            # Stands in for another worker caching the page while the write is still uncommitted.
+            set_cached_response('Kursy', HttpResponse('stale'))
+        self.assertIsNone(get_cached_response('Kursy'))
+
+    def test_authenticated_users_bypass_cache(self):
+        User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+        self.client.get('/courses/')
+        self.client.login(username='admin', password='password')
+        with self.assertTemplateUsed('index.html'):
+            self.client.get('/courses/')
+
+
+class ArticleQuerySetTests(TestCase):
+    def setUp(self):
+        self.news = Page.objects.get(title='Aktualności')
+        now = timezone.now()
+        self.old = Article.objects.create(title='Old', content='Content', pub_date=now - timedelta(days=1),
+                                          page=self.news, show_on_whiteboard=True)
+        self.hidden = Article.objects.create(title='Hidden', content='Content', pub_date=now, page=self.news)
+        self.new = Article.objects.create(title='New', content='Content', pub_date=now,
+                                          page=self.news, show_on_whiteboard=True)
+
+    def test_for_page_is_ordered_by_database(self):
+        articles = Article.objects.for_page('Aktualności')
+        self.assertIn('ORDER BY', str(articles.query))
+        self.assertEqual(list(articles), [self.new, self.hidden, self.old])
+
+    def test_on_whiteboard_filters_and_orders(self):
+        self.assertEqual(list(Article.objects.on_whiteboard()), [self.new, self.old])
+
+    def test_page_title_is_unique(self):
+        with self.assertRaises(IntegrityError):
+            Page.objects.create(title='Aktualności')
+
+
+class NavigationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_nav_is_resolved_once_per_generation(self):
+        nav_items = get_nav_items()
+        self.assertIn(('Aktualności', '/news/'), nav_items)
+        self.assertNotIn('Główna', [title for title, _ in nav_items])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_nav_items(), nav_items)
+
+    def test_page_change_rebuilds_nav(self):
+        get_nav_items()
+        page = Page.objects.get(title='Kursy')
+        page.title = 'Kursy językowe'
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save()
+            # Until the write commits other workers may rebuild the nav, so the generation must not move yet.
+            self.assertIn(('Kursy', '/courses/'), get_nav_items())
+        self.assertIn(('Kursy językowe', '/courses/'), get_nav_items())
+
+    def test_current_page_is_not_linked_in_nav(self):
+        response = self.client.get('/courses/')
+        site_tree = html.fromstring(response.content)
+        links = [link.attrib.get('href') for link in site_tree.xpath("//ul[contains(@class, 'navbar-nav')]//a")]
+        self.assertIn('/news/', links)
+        self.assertNotIn('/courses/', links)
+
+
+@override_settings(ARTICLES_PAGE_SIZE=2)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.courses = Page.objects.get(title='Kursy')
+        now = timezone.now()
+        pub_dates = [now - timedelta(days=2), now - timedelta(days=1), now - timedelta(days=1), now, now]
+        for number, pub_date in enumerate(pub_dates):
+            Article.objects.create(title=f'Article {number}', content='Content', pub_date=pub_date, page=self.courses)
+
+    def collect_titles(self, url):
+        titles = []
+        while url:
+            site_tree = html.fromstring(self.client.get(url).content)
+            titles += [title.text for title in site_tree.xpath("//article/h1")]
+            load_more = site_tree.xpath("//a[@id='load_more']")
+            url = load_more[0].attrib['href'] if load_more else None
+        return titles
+
+    def test_load_more_walks_whole_archive_in_order(self):
+        expected = [article.title for article in Article.objects.for_page('Kursy')]
+        self.assertEqual(self.collect_titles('/courses/'), expected)
+
+    def test_listing_and_cursor_pages_are_read_in_index_order(self):
+        first = Article.objects.for_page('Kursy').published()
+        cursor = first[1]
+        later = first.filter(Q(pub_date__lt=cursor.pub_date) | Q(pub_date=cursor.pub_date, id__lt=cursor.id))
+        for queryset in (first, later, Article.objects.on_whiteboard().published()):
+            plan = queryset[:3].explain()
+            self.assertIn('_newest_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_editor_listing_is_paginated(self):
+        User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+        self.client.login(username='admin', password='password')
+        expected = [article.title for article in Article.objects.for_page('Kursy')]
+        self.assertEqual(self.collect_titles('/add_article/courses/'), expected)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get('/courses/?after=garbage')
+        site_tree = html.fromstring(response.content)
+        self.assertEqual(len(site_tree.xpath("//article")), 2)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.courses = Page.objects.get(title='Kursy')
+        self.article = Article.objects.create(title='Title', content='Content', pub_date=timezone.now(),
+                                              page=self.courses)
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.client.get('/courses/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_article_edit_bumps_page_version(self):
+        etag = self.client.get('/courses/')['ETag']
+        version = Page.objects.get(pk=self.courses.pk).version
+        self.article.title = 'Changed'
+        self.article.save()
+        response = self.client.get('/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(Page.objects.get(pk=self.courses.pk).version, version + 1)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get('/courses/')['Last-Modified']
+        response = self.client.get('/courses/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+class PrerenderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.news = Page.objects.get(title='Aktualności')
+
+    def test_command_writes_every_public_page(self):
+        call_command('prerender', output=self.root, stdout=open(os.devnull, 'w'))
+        for page in Page.objects.all():
+            file = self.root / page.page_url / 'index.html'
+            self.assertTrue(file.exists(), f'{file} was not written')
+        self.assertIn('whiteboard', (self.root / 'index.html').read_text())
+
+    def test_article_save_rerenders_only_affected_pages(self):
+        with override_settings(PRERENDER_ON_SAVE=True, PRERENDER_ROOT=self.root):
+            with self.captureOnCommitCallbacks(execute=True):
+                Article.objects.create(title='Plain News', content='Content', pub_date=timezone.now(), page=self.news)
+            self.assertEqual([path.relative_to(self.root) for path in self.root.rglob('*.html')],
+                             [Path('news/index.html')])
+            with self.captureOnCommitCallbacks(execute=True):
+                Article.objects.create(title='Whiteboard News', content='Content', pub_date=timezone.now(),
+                                       page=self.news, show_on_whiteboard=True)
+        self.assertIn('Whiteboard News', (self.root / 'index.html').read_text())
+        self.assertIn('Whiteboard News', (self.root / 'news' / 'index.html').read_text())
+
+    def test_async_public_views_are_rendered(self):
+        match = ResolverMatch(async_views.page, (), {'slug': 'news'}, url_name='page')
+        with mock.patch('articles_app.prerender.resolve', return_value=match):
+            content = render_public_page('/news/')
+        self.assertIn('href="/courses/"', content.decode())
+
+
+class ContentPipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+
+    def test_save_stores_sanitized_html_and_derived_columns(self):
+        article = Article.objects.create(
+            title='Title', pub_date=timezone.now(), page=self.news,
+            content='<p onclick="steal()">Ala ma <b>kota</b></p><script>alert(1)</script><p>i psa</p>')
+        self.assertEqual(article.content_html, '<p>Ala ma <b>kota</b></p><p>i psa</p>')
+        self.assertEqual(article.excerpt, 'Ala ma kota i psa')
+        self.assertEqual(article.word_count, 5)
+        self.assertEqual(article.reading_time, 1)
+
+    def test_html5_blocks_separate_words(self):
+        article = Article.objects.create(
+            title='Title', pub_date=timezone.now(), page=self.news,
+            content='<figure><img src="/a.jpg"><figcaption>cap</figcaption></figure><table><tr><td>a</td>'
+                    '<td>x</td></tr></table><section>koniec<br>linii</section>')
+        self.assertEqual(article.excerpt, 'cap a x koniec linii')
+        self.assertEqual(article.word_count, 5)
+
+    def test_edit_recomputes_derived_columns(self):
+        article = Article.objects.create(title='Title', content='<p>one two</p>', pub_date=timezone.now(),
+                                         page=self.news)
+        article.content = '<p>one two three</p>'
+        article.save(update_fields=['content'])
+        article.refresh_from_db()
+        self.assertEqual(article.word_count, 3)
+        self.assertEqual(article.content_html, '<p>one two three</p>')
+
+    def test_whiteboard_shows_excerpt(self):
+        Article.objects.create(title='Title', content='<p>' + 'słowo ' * 100 + '</p>', pub_date=timezone.now(),
+                               page=self.news, show_on_whiteboard=True)
+        site_tree = html.fromstring(self.client.get('/').content)
+        excerpt = site_tree.xpath("//p[@class='whiteboard_excerpt']")[0].text
+        self.assertEqual(len(excerpt.split()), 30)
+
+
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        self.media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root, RESPONSIVE_IMAGE_WIDTHS=[480, 960, 4000]))
+        self.storage = ImageVariantStorage(location=self.media_root)
+
+    def upload_image(self):
+        buffer = ContentFile(b'', name='photo.jpg')
+        Image.new('RGB', (1600, 800), 'green').save(buffer, format='JPEG')
+        name = self.storage.save('ckeditor_uploads/2024/01/01/photo.jpg', buffer)
+        images.wait_for_variants(name)
+        return name
+
+    def test_upload_generates_resized_and_webp_variants(self):
+        self.upload_image()
+        directory = Path(self.media_root) / 'ckeditor_uploads/2024/01/01'
+        self.assertEqual(sorted(path.name for path in directory.iterdir()),
+                         ['photo-1600w.webp', 'photo-480w.jpg', 'photo-480w.webp', 'photo-960w.jpg',
+                          'photo-960w.webp', 'photo.jpg'])
+        with Image.open(directory / 'photo-480w.jpg') as variant:
+            self.assertEqual(variant.size, (480, 240))
+
+    def test_variants_are_upright_and_keep_the_colour_profile(self):
+        buffer = ContentFile(b'', name='phone.jpg')
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+        Image.new('RGB', (1600, 800), 'green').save(buffer, format='JPEG', exif=exif, icc_profile=icc_profile)
+        name = self.storage.save('ckeditor_uploads/2024/01/01/phone.jpg', buffer)
+        images.wait_for_variants(name)
+        with Image.open(Path(self.media_root) / 'ckeditor_uploads/2024/01/01/phone-480w.jpg') as variant:
+            self.assertEqual(variant.size, (480, 960))
+            self.assertEqual(variant.info['icc_profile'], icc_profile)
+        self.assertIn('phone.jpg 800w', images.srcset(name))
+
+    def test_saves_wait_for_variants_generated_by_another_worker(self):
+        name = self.upload_image()
+        marker = Path(images.pending_marker(name))
+        marker.touch()
+        threading.Timer(0.2, marker.unlink).start()
+        started = time.monotonic()
+        images.wait_for_variants(name)
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        self.assertFalse(marker.exists())
+
+    def test_article_html_gets_srcset_and_webp_source(self):
+        name = self.upload_image()
+        article = Article.objects.create(title='Title', pub_date=timezone.now(),
+                                         content=f'<p><img src="/media/{name}" alt="zdjęcie"> podpis</p>')
+        fragment = html.fragment_fromstring(article.content_html)
+        img = fragment.xpath('//picture/img')[0]
+        self.assertEqual(img.attrib['srcset'], '/media/ckeditor_uploads/2024/01/01/photo-480w.jpg 480w, '
+                                               '/media/ckeditor_uploads/2024/01/01/photo-960w.jpg 960w, '
+                                               '/media/ckeditor_uploads/2024/01/01/photo.jpg 1600w')
+        source = fragment.xpath('//picture/source')[0]
+        self.assertEqual(source.attrib['type'], 'image/webp')
+        self.assertIn('photo-1600w.webp 1600w', source.attrib['srcset'])
+        self.assertEqual(fragment.xpath('//picture')[0].tail, ' podpis')
+
+    def test_unreadable_uploads_are_left_alone(self):
+        name = self.storage.save('ckeditor_uploads/2024/01/01/bad.jpg', ContentFile(b'not an image'))
+        content = f'<p><img src="/media/{name}"></p>'
+        article = Article.objects.create(title='Title', pub_date=timezone.now(), content=content)
+        self.assertEqual(article.content_html, content)
+
+    def test_external_images_are_left_alone(self):
+        article = Article.objects.create(title='Title', pub_date=timezone.now(),
+                                         content='<p><img src="https://example.com/a.jpg"></p>')
+        self.assertEqual(article.content_html, '<p><img src="https://example.com/a.jpg"></p>')
+
+
+class StaticPipelineTests(TestCase):
+    def setUp(self):
+        self.static_root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(
+            STATIC_ROOT=self.static_root,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder']))
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.manifest = staticfiles_storage.hashed_files
+
+    def serve(self, path):
+        return serve_static(RequestFactory().get(f'/static/{path}'), path, document_root=self.static_root)
+
+    def test_collectstatic_fingerprints_and_precompresses(self):
+        hashed_css = self.manifest['css/styles.css']
+        self.assertNotEqual(hashed_css, 'css/styles.css')
+        self.assertTrue((self.static_root / f'{hashed_css}.gz').exists())
+        self.assertTrue((self.static_root / f'{hashed_css}.br').exists())
+        self.assertFalse((self.static_root / f"{self.manifest['img/logo2.png']}.gz").exists())
+        self.assertEqual(staticfiles_storage.url('css/styles.css'), f'/static/{hashed_css}')
+
+    def test_hashed_files_are_served_as_immutable(self):
+        response = self.serve(self.manifest['css/styles.css'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        response = self.serve('css/styles.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+
+class FileServerTests(TestCase):
+    def setUp(self):
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(STATIC_ROOT=self.root / 'static', MEDIA_ROOT=self.root / 'media'))
+        (self.root / 'static' / 'css').mkdir(parents=True)
+        (self.root / 'media').mkdir()
+        (self.root / 'static' / 'css' / 'site.css').write_bytes(b'0123456789')
+        (self.root / 'static' / 'css' / 'site.css.br').write_bytes(b'brotli')
+        (self.root / 'media' / 'photo.jpg').write_bytes(b'jpeg-bytes')
+
+    def test_whole_file_is_streamed_with_validators(self):
+        response = self.client.get('/static/css/site.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        response = self.client.get('/static/css/site.css', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.client.get('/static/css/site.css', HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        response = self.client.get('/static/css/site.css', HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.client.get('/static/css/site.css', HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_precompressed_variant_is_negotiated(self):
+        response = self.client.get('/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(b''.join(response.streaming_content), b'brotli')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        response = self.client.get('/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_media_is_served_and_traversal_is_rejected(self):
+        response = self.client.get('/media/photo.jpg')
+        self.assertEqual(b''.join(response.streaming_content), b'jpeg-bytes')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.assertEqual(self.client.get('/media/../static/css/site.css').status_code, 404)
+        self.assertEqual(self.client.get('/media/missing.jpg').status_code, 404)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+        Article.objects.create(title='Async News', content='Content', pub_date=timezone.now(), page=self.news,
+                               show_on_whiteboard=True)
+
+    def async_get(self, path, headers=None):
+        request = AsyncRequestFactory().get(path, headers=headers)
+        request.user = AnonymousUser()
+        return request
+
+    async def test_async_views_render_same_pages(self):
+        response = await async_views.page(self.async_get('/news/'), slug='news')
+        self.assertContains(response, 'Async News')
+        response = await async_views.page(self.async_get('/'))
+        site_tree = html.fromstring(response.content)
+        self.assertEqual(len(site_tree.xpath("//div[@id='whiteboard']//li/a")), 1)
+
+    async def test_async_views_use_response_cache_and_conditional_get(self):
+        response = await async_views.page(self.async_get('/news/'), slug='news')
+        # A queryset update sends no signals, so only a cache hit can still show the old title.
+        await Article.objects.filter(title='Async News').aupdate(title='Changed behind the cache')
+        cached = await async_views.page(self.async_get('/news/'), slug='news')
+        self.assertEqual(cached.content, response.content)
+        not_modified = await async_views.page(self.async_get('/news/', headers={'If-None-Match': response['ETag']}), slug='news')
+        self.assertEqual(not_modified.status_code, 304)
+
+
+class SQLiteProfileTests(TestCase):
+    def test_pragmas_are_applied_to_new_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_invalid_pragmas_are_rejected(self):
+        with self.assertRaises(ValueError):
+            apply_sqlite_pragmas(connection, {'busy_timeout': '1; DROP TABLE articles_app_article'})
+
+
+class BenchCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Article.objects.create(title='Bench', content='<p>Bench</p>', pub_date=timezone.now(),
+                               page=Page.objects.get(title='Aktualności'))
+
+    def test_routes_cover_urlconf_and_detect_login(self):
+        routes, skipped = benchmark_routes()
+        authenticated = {name: needs_login for name, _, needs_login in routes}
+        self.assertFalse(authenticated['page:news'])
+        self.assertTrue(authenticated['edit_page:news'])
+        self.assertCountEqual(skipped, ['logout', 'delete_article'])
+
+    def test_regressions_against_baseline(self):
+        baseline = {'news': {'p95_ms': 10.0, 'req_per_s': 100.0, 'queries': 2}}
+        self.assertEqual(find_regressions({'news': {'p95_ms': 12.0, 'req_per_s': 90.0, 'queries': 2}},
+                                          baseline, 0.25), [])
+        regressions = find_regressions({'news': {'p95_ms': 40.0, 'req_per_s': 50.0, 'queries': 3}}, baseline, 0.25)
+        self.assertEqual(len(regressions), 3)
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Article.objects.create(title='Timed', content='<p>Timed</p>', pub_date=timezone.now(),
+                               page=Page.objects.get(title='Aktualności'))
+
+    def server_timing(self, response):
+        return dict(metric.split(';', 1)[0:2] for metric in response['Server-Timing'].split(', '))
+
+    def test_public_and_editor_views_report_timings(self):
+        timing = self.server_timing(self.client.get('/news/'))
+        self.assertEqual(set(timing), {'sql', 'render', 'total'})
+        self.assertNotIn('"0 queries"', timing['sql'])
+        self.assertNotEqual(timing['render'], 'dur=0.0')
+        User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+        self.client.login(username='admin', password='password')
+        self.assertIn('queries', self.client.get('/add_article/news/')['Server-Timing'])
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs('articles_app.timing', 'WARNING') as logs:
+            self.client.get('/news/')
+        self.assertIn('Slow request GET /news/ -> 200', logs.output[0])
+
+    async def test_async_views_report_timings(self):
+        response = await self.async_client.get('/news/')
+        self.assertIn('queries', response['Server-Timing'])
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.metrics_dir.cleanup)
+        settings_override = override_settings(METRICS_DIR=self.metrics_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        process_metrics.reset()
+
+    def test_requests_latency_size_and_cache_results_per_view(self):
+        self.client.get('/news/')
+        self.client.get('/news/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('coolschool_requests_total{method="GET",status="200",view="page:news"} 2', body)
+        self.assertIn('coolschool_page_cache_total{result="hit",view="page:news"} 1', body)
+        self.assertIn('coolschool_page_cache_total{result="miss",view="page:news"} 1', body)
+        self.assertIn('coolschool_request_duration_seconds_bucket{view="page:news",le="+Inf"} 2', body)
+        self.assertIn('coolschool_response_size_bytes_count{view="page:news"} 2', body)
+
+    def test_totals_are_summed_across_worker_files(self):
+        self.client.get('/news/')
+        other_worker = {'counters': [['coolschool_requests_total',
+                                      [['method', 'GET'], ['status', '200'], ['view', 'page:news']], 5]],
+                        'histograms': []}
+        Path(self.metrics_dir.name, f'{os.getppid()}.json').write_text(json.dumps(other_worker))
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('coolschool_requests_total{method="GET",status="200",view="page:news"} 6', body)
+
+    def test_files_of_exited_workers_are_pruned(self):
+        exited = subprocess.Popen(['true'])
+        exited.wait()
+        dead_file = Path(self.metrics_dir.name, f'{exited.pid}.json')
+        dead_file.write_text(json.dumps({'counters': [['coolschool_requests_total', [['view', 'page:news']], 5]],
+                                         'histograms': []}))
+        self.assertNotIn('coolschool_requests_total{view="page:news"}', self.client.get('/metrics').content.decode())
+        self.assertFalse(dead_file.exists())
+
+    def test_only_superusers_or_localhost(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 403)
+        User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+        self.client.login(username='admin', password='password')
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 200)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+
+    def create(self, title, content):
+        return Article.objects.create(title=title, content=content, pub_date=timezone.now(), page=self.news)
+
+    def test_ranked_and_highlighted_results(self):
+        self.create('Wakacje', '<p>Nowy kurs angielskiego w lipcu.</p>')
+        self.create('Kurs angielskiego', '<p>Zapisy ruszają.</p>')
+        response = self.client.get('/search/', {'q': 'angielsk'})
+        results = response.context['results']
+        self.assertEqual([result['title'] for result in results], ['Kurs angielskiego', 'Wakacje'])
+        self.assertContains(response, 'kurs <mark>angielskiego</mark> w lipcu')
+        self.assertContains(response, 'href="/news/"')
+
+    def test_index_follows_saves_and_deletes(self):
+        article = self.create('Ogłoszenie', '<p>Stara treść</p>')
+        article.content = '<p>Nowa treść</p>'
+        article.save()
+        self.assertEqual(search_articles('stara'), [])
+        self.assertEqual(len(search_articles('nowa')), 1)
+        article.delete()
+        self.assertEqual(search_articles('nowa'), [])
+
+    def test_snippets_are_escaped_and_operators_ignored(self):
+        self.create('Kod', '<p>Użyj &lt;script&gt;alert(1)&lt;/script&gt; ostrożnie</p>')
+        snippet = str(search_articles('alert')[0]['snippet'])
+        self.assertIn('&lt;script&gt;<mark>alert</mark>', snippet)
+        self.assertEqual(search_articles('" OR NEAR( * ^'), [])
+
+    def test_rebuild_command_indexes_bulk_created_articles(self):
+        article = Article(title='Hurtowy import', content='<p>Import</p>', pub_date=timezone.now(), page=self.news)
+        article.process_content()
+        Article.objects.bulk_create([article])
+        self.assertEqual(search_articles('hurtowy'), [])
+        call_command('rebuild_search_index', stdout=open(os.devnull, 'w'))
+        self.assertEqual(len(search_articles('hurtowy')), 1)
+
+
+class PageRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+
+    def test_new_page_is_routed_without_code_changes(self):
+        page = Page.objects.create(title='Galeria', slug='galeria')
+        Article.objects.create(title='Zdjęcia', content='Zdjęcia', pub_date=timezone.now(), page=page)
+        self.assertEqual((page.page_url, page.edit_url), ('galeria/', '/add_article/galeria/'))
+        self.assertContains(self.client.get('/galeria/'), 'Zdjęcia')
+        self.assertIn(('Galeria', '/galeria/'), get_nav_items())
+        self.client.login(username='admin', password='password')
+        response = self.client.post('/add_article/galeria/', {'title': 'Nowe', 'content': 'Nowe'})
+        self.assertRedirects(response, '/add_article/galeria/')
+        self.assertTrue(Article.objects.filter(title='Nowe', page=page).exists())
+
+    def test_renamed_slug_moves_page_and_its_links(self):
+        page = Page.objects.get(slug='courses')
+        self.assertIn(('Kursy', '/courses/'), get_nav_items())
+        page.slug = 'kursy'
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save()
+        self.assertEqual((page.page_url, page.edit_url), ('kursy/', '/add_article/kursy/'))
+        self.assertIn(('Kursy', '/kursy/'), get_nav_items())
+        self.assertEqual(public_page_paths(['Kursy']), {'Kursy': '/kursy/'})
+        self.assertEqual(self.client.get('/kursy/').status_code, 200)
+        self.assertEqual(self.client.get('/courses/').status_code, 404)
+        self.client.login(username='admin', password='password')
+        response = self.client.post('/add_article/kursy/', {'title': 'Nowe', 'content': 'Nowe'})
+        self.assertRedirects(response, '/add_article/kursy/')
+
+    def test_page_lookup_is_served_from_the_map(self):
+        get_page('news')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_page('contact').template, 'contact.html')
+
+    def test_unknown_and_main_slugs_are_not_found(self):
+        self.assertEqual(self.client.get('/nie-ma/').status_code, 404)
+        self.assertEqual(self.client.get('/main/').status_code, 404)
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+    def test_slugs_of_fixed_routes_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            Page(title='Szukaj', slug='search').full_clean()
+
+
+class ArticleTransferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def export(self, name, **options):
+        path = os.path.join(self.directory.name, name)
+        call_command('export_articles', output=path, **options)
+        return path
+
+    def test_round_trip_updates_instead_of_duplicating(self):
+        article = Article.objects.create(title='Przeprowadzka', content='<p>Stara</p>', pub_date=timezone.now(),
+                                         page=self.news, show_on_whiteboard=True)
+        path = self.export('articles.ndjson')
+        Article.objects.filter(pk=article.pk).update(content='<p>Zmieniona</p>')
+        call_command('import_articles', path, stdout=open(os.devnull, 'w'))
+        self.assertEqual(Article.objects.count(), 1)
+        article.refresh_from_db()
+        self.assertEqual(article.content_html, '<p>Stara</p>')
+        article.delete()
+        call_command('import_articles', path, stdout=open(os.devnull, 'w'))
+        imported = Article.objects.get()
+        self.assertEqual((imported.page, imported.excerpt, imported.show_on_whiteboard), (self.news, 'Stara', True))
+        self.assertEqual(search_articles('stara')[0]['id'], imported.id)
+
+    def test_import_invalidates_cached_pages(self):
+        self.assertNotContains(self.client.get('/news/'), 'Z importu')
+        path = os.path.join(self.directory.name, 'articles.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write('title,page,pub_date,show_on_whiteboard,content,updated_at\r\n'
+                       'Z importu,Aktualności,2024-01-01T10:00:00+00:00,True,<p>Treść</p>,\r\n')
+        call_command('import_articles', path, stdout=open(os.devnull, 'w'))
+        self.assertContains(self.client.get('/news/'), 'Z importu')
+        self.assertContains(self.client.get('/'), 'Z importu')
+
+    def test_unknown_page_rolls_back_the_import(self):
+        path = os.path.join(self.directory.name, 'articles.ndjson')
+        rows = [{'title': 'Dobry', 'page': 'Aktualności', 'pub_date': '2024-01-01T10:00:00+00:00', 'content': 'x'},
+                {'title': 'Zły', 'page': 'Nie ma', 'pub_date': '2024-01-01T10:00:00+00:00', 'content': 'x'}]
+        Path(path).write_text(''.join(json.dumps(row) + '\n' for row in rows))
+        with self.assertRaisesMessage(CommandError, "Row 2: unknown page 'Nie ma'"):
+            call_command('import_articles', path, batch_size=1)
+        self.assertFalse(Article.objects.exists())
+
+    def test_streaming_export_since_timestamp(self):
+        old = Article.objects.create(title='Stary', content='x', pub_date=timezone.now(), page=self.news)
+        Article.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        Article.objects.create(title='Nowy', content='x', pub_date=timezone.now(), page=self.news)
+        User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+        self.client.login(username='admin', password='password')
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get('/export/articles/', {'format': 'csv', 'since': since})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'title,page,pub_date,show_on_whiteboard,content,updated_at')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['Nowy'])
+
+
+class NewsFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+        Article.objects.create(title='Na tablicy', content='<p>Ważne</p>', pub_date=timezone.now(), page=self.news,
+                               show_on_whiteboard=True)
+        Article.objects.create(title='Zwykły', content='<p>Zwykły</p>', pub_date=timezone.now() - timedelta(days=1),
+                               page=self.news)
+
+    def test_atom_and_rss_list_news_with_whiteboard_categories(self):
+        atom = html.etree.fromstring(self.client.get('/feed/atom/').content)
+        namespace = {'atom': 'http://www.w3.org/2005/Atom'}
+        entries = atom.findall('atom:entry', namespace)
+        self.assertEqual([entry.findtext('atom:title', namespaces=namespace) for entry in entries],
+                         ['Na tablicy', 'Zwykły'])
+        self.assertEqual(entries[0].find('atom:category', namespace).get('term'), 'Tablica')
+        self.assertIsNone(entries[1].find('atom:category', namespace))
+        rss = self.client.get('/feed/rss/')
+        self.assertTrue(rss['Content-Type'].startswith('application/rss+xml'))
+        self.assertContains(rss, '<category>Tablica</category>')
+
+    def test_feed_is_cached_and_supports_conditional_get(self):
+        response = self.client.get('/feed/atom/')
+        with self.assertNumQueries(0):
+            cached = self.client.get('/feed/atom/')
+        self.assertEqual(cached.content, response.content)
+        not_modified = self.client.get('/feed/atom/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertIn('Last-Modified', response)
+
+    @override_settings(SITE_URL='https://szkola.example')
+    def test_links_use_the_site_url_not_the_request_host(self):
+        self.client.get('/feed/atom/', HTTP_HOST='127.0.0.1')
+        atom = html.etree.fromstring(self.client.get('/feed/atom/').content)
+        links = atom.xpath('//@href') + atom.xpath('//*[local-name()="id"]/text()')
+        self.assertIn('https://szkola.example/feed/atom/', links)
+        self.assertIn('https://szkola.example/news/', links)
+        self.assertFalse([link for link in links if '127.0.0.1' in link or 'testserver' in link], links)
+
+    def test_feed_is_regenerated_on_article_change(self):
+        etag = self.client.get('/feed/rss/')['ETag']
+        Article.objects.create(title='Świeży', content='x', pub_date=timezone.now(), page=self.news)
+        response = self.client.get('/feed/rss/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Świeży')
+
+
+class EditorListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.courses = Page.objects.get(title='Kursy')
+        User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+        self.client.login(username='admin', password='password')
+        self.article = Article.objects.create(title='Kurs', content='<p>Pełna treść kursu</p>',
+                                              pub_date=timezone.now(), page=self.courses)
+
+    def add_siblings(self, count):
+        for number in range(count):
+            Article.objects.create(title=f'Inny {number}', content='<p>Inna treść</p>',
+                                   pub_date=timezone.now() - timedelta(hours=number + 1), page=self.courses)
+
+    def test_listing_defers_bodies(self):
+        response = self.client.get('/add_article/courses/')
+        self.assertNotContains(response, 'Pełna treść kursu')
+        self.assertContains(response, f'data-body-url="/edit_article/{self.article.id}/body/"')
+        self.assertIn('content', response.context['articles'][0].get_deferred_fields())
+
+    def test_body_endpoint_returns_cleaned_html_to_superusers(self):
+        response = self.client.get(f'/edit_article/{self.article.id}/body/')
+        self.assertEqual(response.json(), {'id': self.article.id, 'content_html': '<p>Pełna treść kursu</p>'})
+        self.client.logout()
+        self.assertEqual(self.client.get(f'/edit_article/{self.article.id}/body/').status_code, 302)
+
+    def test_edit_article_queries_do_not_grow_with_siblings(self):
+        self.add_siblings(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(f'/edit_article/{self.article.id}/')
+        self.add_siblings(30)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(f'/edit_article/{self.article.id}/')
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(len(response.context['articles']), settings.ARTICLES_PAGE_SIZE)
+
+
+class ScheduledPublishingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+        User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+
+    def test_scheduled_articles_are_hidden_from_visitors(self):
+        Article.objects.create(title='Jutrzejszy', content='<p>Jutro</p>', page=self.news, show_on_whiteboard=True,
+                               pub_date=timezone.now() + timedelta(days=1))
+        self.assertNotContains(self.client.get('/news/'), 'Jutrzejszy')
+        self.assertNotContains(self.client.get('/'), 'Jutrzejszy')
+        self.assertNotContains(self.client.get('/feed/atom/'), 'Jutrzejszy')
+        self.assertEqual(search_articles('jutro'), [])
+        self.client.login(username='admin', password='password')
+        self.assertContains(self.client.get('/add_article/news/'), 'Zaplanowany')
+
+    def test_editor_can_schedule_an_article(self):
+        self.client.login(username='admin', password='password')
+        # The editor types the school's local time, e.g. 12:00 in Warsaw is 10:00 or 11:00 UTC.
+        publish_at = timezone.localtime(timezone.now() + timedelta(days=2),
+                                        timezone=zoneinfo.ZoneInfo(settings.EDITOR_TIME_ZONE))
+        self.client.post('/add_article/news/', {'title': 'Plan', 'content': 'Plan',
+                                                'pub_date': publish_at.strftime('%Y-%m-%dT%H:%M')})
+        article = Article.objects.get(title='Plan')
+        self.assertEqual(article.pub_date, publish_at.replace(second=0, microsecond=0))
+        self.assertFalse(article.is_published)
+
+    def test_unchanged_date_keeps_its_seconds(self):
+        self.client.login(username='admin', password='password')
+        article = Article.objects.create(title='Stary', content='x', page=self.news,
+                                         pub_date=timezone.now() - timedelta(seconds=3601))
+        form_page = html.fromstring(self.client.get(f'/edit_article/{article.id}/').content)
+        shown_date = form_page.xpath("//input[@name='pub_date']/@value")[0]
+        self.client.post(f'/edit_article/{article.id}/', {'title': 'Nowy tytuł', 'content': 'x',
+                                                          'pub_date': shown_date})
+        updated = Article.objects.get(id=article.id)
+        self.assertEqual(updated.title, 'Nowy tytuł')
+        self.assertEqual(updated.pub_date, article.pub_date)
+
+    def test_prerendered_page_is_rewritten_at_next_publication(self):
+        root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(PRERENDER_ROOT=root))
+        Article.objects.create(title='Za sekundę', content='x', page=self.news,
+                               pub_date=timezone.now() + timedelta(seconds=1))
+        with mock.patch('articles_app.prerender.threading.Timer') as timer:
+            refresh_prerendered(['Aktualności'])
+        delay, callback, args = timer.call_args.args
+        self.assertTrue(0 < delay <= 1)
+        self.assertEqual((callback, args), (run_scheduled_prerender, ['Aktualności']))
+        timer.return_value.start.assert_called_once_with()
+        self.assertNotIn('Za sekundę', (root / 'news' / 'index.html').read_text())
+        with clock_moved_forward(delay + 0.05), mock.patch('articles_app.prerender.threading.Timer') as timer:
+            refresh_prerendered(args)
+        self.assertIn('Za sekundę', (root / 'news' / 'index.html').read_text())
+        timer.assert_not_called()
+
+    def test_cache_timeout_ends_at_next_publication(self):
+        self.assertIsNone(cache_timeout(None))
+        self.assertIn(cache_timeout(timezone.now() + timedelta(seconds=100)), (99, 100))
+        with override_settings(PAGE_CACHE_TIMEOUT=30):
+            self.assertEqual(cache_timeout(timezone.now() + timedelta(seconds=100)), 30)
+        self.assertEqual(cache_timeout(timezone.now() - timedelta(seconds=5)), 0)
+
+    def test_cached_page_and_etag_change_when_article_goes_live(self):
+        Article.objects.create(title='Za chwilę', content='x', page=self.news,
+                               pub_date=timezone.now() + timedelta(seconds=2))
+        response = self.client.get('/news/')
+        self.assertNotContains(response, 'Za chwilę')
+        with clock_moved_forward(2.05):
+            live = self.client.get('/news/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(live.status_code, 200)
+        self.assertContains(live, 'Za chwilę')
+
+
+@override_settings(WHITEBOARD_SIZE=3)
+class WhiteboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+
+    def create(self, title, hours_ago=0, **kwargs):
+        return Article.objects.create(title=title, content=f'<p>{title}</p>', page=self.news, show_on_whiteboard=True,
+                                      pub_date=timezone.now() - timedelta(hours=hours_ago), **kwargs)
+
+    def test_signals_keep_a_capped_precomputed_list(self):
+        for number in range(5):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create(f'Ogłoszenie {number}', hours_ago=number)
+        items = cache.get(WHITEBOARD_KEY)
+        self.assertEqual([item.title for item in items], ['Ogłoszenie 0', 'Ogłoszenie 1', 'Ogłoszenie 2'])
+        self.assertEqual(items[0].excerpt, 'Ogłoszenie 0')
+
+    def test_index_reads_whiteboard_without_queries(self):
+        self.create('Na tablicy')
+        get_whiteboard()
+        with self.assertNumQueries(0):
+            self.assertEqual([item.title for item in get_whiteboard()], ['Na tablicy'])
+
+    def test_leaving_the_whiteboard_updates_the_list(self):
+        article = self.create('Zdejmowany')
+        self.assertEqual(len(get_whiteboard()), 1)
+        article.show_on_whiteboard = False
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+        self.assertEqual(cache.get(WHITEBOARD_KEY), [])
+        site_tree = html.fromstring(self.client.get('/').content)
+        self.assertEqual(site_tree.xpath("//div[@id='whiteboard']//li/a"), [])
+
+
+class ArticleFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.news = Page.objects.get(title='Aktualności')
+        self.first = Article.objects.create(title='Pierwszy', content='<p>jeden</p>', page=self.news,
+                                            pub_date=timezone.now())
+        self.second = Article.objects.create(title='Drugi', content='<p>dwa</p>', page=self.news,
+                                             pub_date=timezone.now())
+        self.client.get('/news/')
+
+    def test_fragments_are_reused_until_the_article_version_changes(self):
+        # Queryset updates bypass updated_at, so the cached fragments stay in place.
+        Article.objects.filter(pk=self.second.pk).update(title='Drugi zmieniony')
+        self.first.title = 'Pierwszy zmieniony'
+        self.first.save()
+        invalidate_page('Aktualności')
+        response = self.client.get('/news/')
+        self.assertContains(response, 'Pierwszy zmieniony')
+        self.assertNotContains(response, 'Drugi zmieniony')
+
+    def test_editor_fragment_varies_on_publication(self):
+        admin = User.objects.create_superuser('fragmenty', password='haslo')
+        self.client.force_login(admin)
+        Article.objects.create(title='Później', content='x', page=self.news,
+                               pub_date=timezone.now() + timedelta(seconds=1))
+        self.assertContains(self.client.get('/add_article/news/'), 'Zaplanowany')
+        with clock_moved_forward(1.05):
+            self.assertNotContains(self.client.get('/add_article/news/'), 'Zaplanowany')
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'cache.sqlite3'
+
+    def backend(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_entries_are_shared_between_processes(self):
+        backend = self.backend()
+        backend.set('before_fork', 1)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                backend.set('from_child', backend.get('before_fork') + 1)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(self.backend().get('from_child'), 2)
+
+    def test_expiry_add_and_incr(self):
+        backend = self.backend()
+        backend.set('gone', 'x', timeout=0)
+        self.assertIsNone(backend.get('gone'))
+        self.assertTrue(backend.add('gone', 'y'))
+        self.assertFalse(backend.add('gone', 'z'))
+        backend.set('counter', 1)
+        self.assertEqual(backend.incr('counter', 2), 3)
+        self.assertEqual(backend.get_many(['gone', 'counter', 'missing']), {'gone': 'y', 'counter': 3})
+        self.assertTrue(backend.delete('gone'))
+        self.assertFalse(backend.has_key('gone'))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        backend = self.backend(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for number in range(3):
+            backend.set(f'key{number}', number)
+        backend.local.connection.execute('UPDATE cache SET accessed = accessed - 10')
+        backend.get('key0')
+        backend.set('key3', 3)
+        self.assertEqual(backend.get_many(['key0', 'key1', 'key2', 'key3']), {'key0': 0, 'key3': 3})
+
+    def test_running_totals_follow_every_write(self):
+        backend = self.backend()
+        backend.set('a', 'x' * 100)
+        backend.set_many({'a': 'y' * 10, 'b': 1, 'c': 2})
+        backend.add('d', 3)
+        backend.incr('b', 10 ** 20)
+        backend.delete('c')
+        connection = backend.local.connection
+        totals = 'SELECT count, size FROM cache_stats'
+        self.assertEqual(connection.execute(totals).fetchone(),
+                         connection.execute('SELECT count(*), total(size) FROM cache').fetchone())
+        self.assertEqual(connection.execute(totals).fetchone()[0], 3)
+        backend.clear()
+        self.assertEqual(connection.execute(totals).fetchone(), (0, 0))
+
+    def test_totals_start_from_an_existing_cache_file(self):
+        backend = self.backend()
+        backend.set_many({'a': 1, 'b': 2})
+        connection = backend.local.connection
+        connection.execute('DROP TABLE cache_stats')
+        backend.disconnect()
+        reopened = self.backend()
+        reopened.get('a')
+        self.assertEqual(reopened.local.connection.execute('SELECT count FROM cache_stats').fetchone(), (2,))
+
+    def test_tests_and_benchmarks_never_use_the_site_cache_file(self):
+        site_cache = settings.CACHES['default']
+        self.assertNotEqual(caches['default'].path, str(site_cache['LOCATION']))
+        self.assertNotEqual(Path(active_settings.METRICS_DIR), Path(settings.METRICS_DIR))
+        scratch = scratch_caches('/tmp/scratch')['default']
+        self.assertEqual(scratch['LOCATION'], '/tmp/scratch/default.sqlite3')
+        self.assertEqual(scratch['KEY_PREFIX'], site_cache['KEY_PREFIX'])
+
+    def test_key_prefix_follows_the_deployed_sources(self):
+        source = Path(self.path.parent) / 'templates'
+        source.mkdir()
+        (source / 'index.html').write_text('<h1>v1</h1>')
+        first = source_digest(source)
+        self.assertEqual(source_digest(source), first)
+        (source / 'index.html').write_text('<h1>v2</h1>')
+        self.assertNotEqual(source_digest(source), first)
+        self.assertEqual(self.backend(KEY_SOURCES=[source]).key_prefix, source_digest(source))
+        self.assertTrue(caches['default'].key_prefix)
+
+    def test_size_limit_evicts_oldest_values(self):
+        backend = self.backend(MAX_SIZE=3000, CULL_FREQUENCY=10)
+        for number in range(4):
+            backend.set(f'blob{number}', b'x' * 1000)
+            backend.local.connection.execute('UPDATE cache SET accessed = accessed - 10')
+        self.assertEqual(list(backend.get_many([f'blob{number}' for number in range(4)])), ['blob2', 'blob3'])
+
+
+class WarmUpTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_public_pages_and_feeds_are_primed(self):
+        with mock.patch('articles_app.warmup.connections') as connections, \
+                self.assertLogs('articles_app.warmup', 'INFO') as logs:
+            warm_up()
+        self.assertIn('Warmed up', logs.output[0])
+        for page in Page.objects.all():
+            self.assertIsNotNone(get_cached_response(page.title), page.title)
+        self.assertIsNotNone(get_cached_response('Aktualności', 'rss'))
+        connections.close_all.assert_called_once_with()
+
+    @override_settings(ALLOWED_HOSTS=['127.0.0.1', 'coolschoolbochnia.azurewebsites.net'],
+                       SITE_URL='https://coolschoolbochnia.azurewebsites.net')
+    def test_production_hosts_render_fresh_pages_and_feeds(self):
+        set_cached_response('Kursy', HttpResponse('stale'))
+        set_cached_response('Aktualności', HttpResponse('stale'), 'atom')
+        with mock.patch('articles_app.warmup.connections'), self.assertNoLogs('articles_app.warmup', 'ERROR'):
+            warm_up()
+        self.assertFalse(hasattr(caches['default'].local, 'connection'))
+        self.assertNotEqual(get_cached_response('Kursy').content, b'stale')
+        feed = get_cached_response('Aktualności', 'atom').content.decode()
+        self.assertIn('https://coolschoolbochnia.azurewebsites.net/news/', feed)
+        self.assertNotIn('testserver', feed)
+
+    def test_results_reach_the_server_log(self):
+        logger = logging.getLogger('articles_app.warmup')
+        self.assertTrue(logger.isEnabledFor(logging.INFO))
+        self.assertTrue(logger.hasHandlers())
+
+    def test_failures_are_logged_and_connections_still_closed(self):
+        with mock.patch('articles_app.warmup.connections') as connections, \
+                mock.patch('articles_app.warmup.render_public_page', side_effect=ValueError('/ returned 500')), \
+                self.assertLogs('articles_app.warmup', 'ERROR'):
+            warm_up()
+        connections.close_all.assert_called_once_with()
+
+    def test_healthz_skips_django(self):
+        start_response = mock.Mock()
+        with self.assertNumQueries(0), mock.patch.object(wsgi, 'django_application') as django_application:
+            body = wsgi.application({'PATH_INFO': '/healthz', 'REQUEST_METHOD': 'GET'}, start_response)
+        self.assertEqual(b''.join(body), b'ok')
+        self.assertEqual(start_response.call_args.args[0], '200 OK')
+        django_application.assert_not_called()
+
+    async def test_healthz_skips_django_under_asgi(self):
+        # Importing asgi defaults ASYNC_PUBLIC_VIEWS for the process; keep it out of the other tests' subprocesses.
+        with mock.patch.dict(os.environ):
+            from CoolSchool import asgi
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        with mock.patch.object(asgi, 'django_application') as django_application:
+            await asgi.application({'type': 'http', 'path': '/healthz', 'method': 'GET'}, None, send)
+        self.assertEqual((sent[0]['status'], sent[1]['body']), (200, b'ok'))
+        django_application.assert_not_called()
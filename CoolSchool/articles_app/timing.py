@@ -0,0 +1,67 @@
+import time
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+# Timings of the request being handled; contextvars follow the request into sync_to_async threads.
+current_timings = ContextVar('current_timings', default=None)
+
+
+class Timings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.render = 0.0
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self):
+        return (f'sql;dur={self.sql * 1000:.1f};desc="{self.queries} queries", '
+                f'render;dur={self.render * 1000:.1f}, total;dur={self.total * 1000:.1f}')
+
+
+def record_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.sql += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            # Nested {% include %}s render through the engine directly, so this adds up top-level renders only.
+            timings.render += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates add their render time to the current request's timings."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
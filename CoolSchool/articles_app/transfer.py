@@ -0,0 +1,139 @@
+import csv
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import MAIN_PAGE_NAME, NEWS_PAGE_NAME, Article, Page
+from .search import fts_available, index_articles
+from .signals import pages_changed
+from .whiteboard import whiteboard_changed
+
+EXPORT_FIELDS = ['title', 'page', 'pub_date', 'show_on_whiteboard', 'content', 'updated_at']
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+BATCH_SIZE = 500
+DERIVED_FIELDS = ['content_html', 'excerpt', 'word_count', 'reading_time']
+
+
+def parse_timestamp(value):
+    timestamp = parse_datetime(value) if isinstance(value, str) else value
+    if timestamp is None:
+        raise ValueError(f'Invalid timestamp: {value!r}')
+    return timezone.make_aware(timestamp) if timezone.is_naive(timestamp) else timestamp
+
+
+def export_rows(since=None, batch_size=BATCH_SIZE):
+    """Yield one dict per article, oldest change first; with since, only articles changed after it."""
+    articles = Article.objects.order_by('updated_at', 'id')
+    if since is not None:
+        articles = articles.filter(updated_at__gt=since)
+    rows = articles.values_list('title', 'page__title', 'pub_date', 'show_on_whiteboard', 'content', 'updated_at')
+    for title, page, pub_date, show_on_whiteboard, content, updated_at in rows.iterator(chunk_size=batch_size):
+        yield {'title': title, 'page': page, 'pub_date': pub_date.isoformat(),
+               'show_on_whiteboard': show_on_whiteboard, 'content': content, 'updated_at': updated_at.isoformat()}
+
+
+class Echo:
+    """File-like object whose write() hands the line back, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_lines(export_format, since=None):
+    return (ndjson_lines if export_format == 'ndjson' else csv_lines)(export_rows(since))
+
+
+def read_rows(file, import_format):
+    if import_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def parse_bool(value):
+    return value is True or str(value).lower() in ('true', '1')
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_rows(rows, batch_size=BATCH_SIZE):
+    """Create or update articles from exported rows in bulk; returns (created, updated).
+
+    Articles are matched on page, title and publication date, so importing an export twice,
+    or an incremental export after a full one, updates instead of duplicating.
+    """
+    page_ids = dict(Page.objects.values_list('title', 'id'))
+    created = updated = 0
+    changed_pages = set()
+    with transaction.atomic():
+        for number, batch in enumerate(batches(rows, batch_size)):
+            articles = [article_from_row(row, page_ids, number * batch_size + index + 1)
+                        for index, row in enumerate(batch)]
+            existing = {(page_id, title, pub_date): id for id, page_id, title, pub_date in
+                        Article.objects.filter(title__in=[article.title for article in articles])
+                        .values_list('id', 'page_id', 'title', 'pub_date')}
+            new, changed = [], []
+            for article in articles:
+                article.pk = existing.get((article.page_id, article.title, article.pub_date))
+                (changed if article.pk else new).append(article)
+            Article.objects.bulk_create(new, batch_size=batch_size)
+            Article.objects.bulk_update(changed, ['content', 'show_on_whiteboard', 'updated_at', *DERIVED_FIELDS],
+                                        batch_size=batch_size)
+            created += len(new)
+            updated += len(changed)
+            # Bulk writes send no signals: update the search index and the pages' caches here instead.
+            if fts_available():
+                index_articles(new + changed)
+            changed_pages.update(affected_pages(articles, page_ids))
+        if changed_pages:
+            pages_changed(changed_pages)
+        if MAIN_PAGE_NAME in changed_pages:
+            whiteboard_changed()
+    return created, updated
+
+
+def article_from_row(row, page_ids, line):
+    page = row.get('page') or None
+    if page is not None and page not in page_ids:
+        raise ValueError(f'Row {line}: unknown page {page!r}')
+    page_id = page_ids.get(page)
+    article = Article(title=row['title'], content=row['content'], page_id=page_id,
+                      pub_date=parse_timestamp(row['pub_date']),
+                      show_on_whiteboard=parse_bool(row.get('show_on_whiteboard', False)),
+                      updated_at=timezone.now())
+    article.process_content()
+    return article
+
+
+def affected_pages(articles, page_ids):
+    titles = {id: title for title, id in page_ids.items()}
+    names = {titles[article.page_id] for article in articles if article.page_id is not None}
+    # An updated news article may just have left the whiteboard, which only the main page shows.
+    if NEWS_PAGE_NAME in names:
+        names.add(MAIN_PAGE_NAME)
+    return names
@@ -1,4 +1,5 @@
-from . import views
+from . import async_views, feeds, views
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 
@@ -19,20 +20,22 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+# Under ASGI the public pages are served by their async counterparts.
+public_views = async_views if settings.ASYNC_PUBLIC_VIEWS else views
+
 urlpatterns = [
-    path('', views.index, name="index"),
-    path('add_article/main/', views.add_main, name="add_main"),
-    path('add_article/news/', views.add_news, name="add_news"),
-    path('add_article/courses/', views.add_courses, name="add_courses"),
-    path('add_article/regulamin/', views.add_regulamin, name="add_regulamin"),
-    path('add_article/privacy_policy/', views.add_privacy_policy, name="add_privacy_policy"),
-    path('add_article/contact/', views.add_contact, name="add_contact"),
-    path('news/', views.news, name="news"),
-    path('courses/', views.courses, name="courses"),
-    path('regulamin/', views.regulamin, name="regulamin"),
-    path('privacy_policy/', views.privacy_policy, name="privacy_policy"),
+    path('', public_views.page, name="index"),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
-    path('contact/', views.contact, name='contact'),
+    path('search/', views.search, name='search'),
     path('edit_article/<int:article_id>/', views.edit_article, name='edit_article'),
+    path('edit_article/<int:article_id>/body/', views.article_body, name='article_body'),
     path('delete_article/<int:article_id>/', views.delete_article, name='delete_article'),
+    path('metrics', views.metrics, name='metrics'),
+    path('export/articles/', views.export_articles, name='export_articles'),
+    path('feed/atom/', feeds.news_atom_feed, name='news_atom_feed'),
+    path('feed/rss/', feeds.news_rss_feed, name='news_rss_feed'),
+    # Pages are data: both routes look the slug up in the cached Page map, so they must stay last.
+    path('add_article/<slug:slug>/', views.edit_page, name='edit_page'),
+    path('<slug:slug>/', public_views.page, name='page'),
 ]
+
@@ -1,143 +1,95 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.views.decorators.http import require_safe
+from .cache import cache_page_response, conditional_page
 from .forms import ArticleForm
+from .metrics import render_prometheus
 from datetime import datetime
-from .models import Article, Page
+from .models import MAIN_PAGE_SLUG, NEWS_PAGE_NAME, Article
+from .navigation import get_page
+from .pagination import paginate_articles
+from .search import search_articles
+from .transfer import FORMATS, export_lines, parse_timestamp
+from .whiteboard import get_whiteboard
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.utils import timezone
+
+
+# Editor listings show titles and dates only; bodies are fetched from article_body when expanded.
+# updated_at is the version their cached fragments are keyed on.
+EDITOR_LISTING_FIELDS = ('id', 'title', 'pub_date', 'updated_at')
 
 
 def is_superuser(user):
     return user.is_authenticated and user.is_superuser
 
 
-def render_edit_page_based_on_template(request, page_name):
-    edit_url = Page.objects.get(title=page_name).edit_url
-    articles = list(Article.objects.filter(page__title=page_name))
-    articles.sort(key=lambda x: x.pub_date, reverse=True)
-    if request.method == 'POST':
-        form = ArticleForm(request.POST)
-        if form.is_valid():
-            article = form.save(commit=False)
-            article.pub_date = timezone.now()
-            article.page = Page.objects.get(title=page_name)
-            article.show_on_whiteboard = False
-            article.save()
-            return redirect(edit_url)
-    else:
-        form = ArticleForm()
-    return render(request, 'edit_page.html', context={'page_name': page_name, 'form': form, 'articles': articles})
+def in_editor_time_zone(view):
+    """Parse and show publication dates in EDITOR_TIME_ZONE rather than the UTC the site stores."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with timezone.override(settings.EDITOR_TIME_ZONE):
+            return view(request, *args, **kwargs)
+    return wrapper
 
 
-def render_page_based_on_index_template(request, page_name):
-    pages = Page.objects.all()
-    articles = list(Article.objects.filter(page__title=page_name))
-    articles.sort(key=lambda x: x.pub_date, reverse=True)
-    default_pages_dict = {}
-    for page in pages:
-        if page.title not in ('Główna', page_name):
-            default_pages_dict.update({page.title: page.page_url.split('/')[0]})
-    return render(request, 'index.html', {'default_pages_dict': default_pages_dict, 'current_page_name': page_name, 'articles': articles})
+def public_page(slug):
+    # The main page is served at / only; the index route passes no slug.
+    if slug == MAIN_PAGE_SLUG:
+        raise Http404('No such page')
+    return get_page(MAIN_PAGE_SLUG if slug is None else slug)
 
 
-@login_required
-@user_passes_test(is_superuser)
-def add_main(request):
-    return render_edit_page_based_on_template(request, 'Główna')
+def public_page_title(request, slug=None):
+    return public_page(slug).title
 
 
 @login_required
 @user_passes_test(is_superuser)
-def add_news(request):
-    page_name = 'Aktualności'
-    edit_url = Page.objects.get(title=page_name).edit_url
-    articles = list(Article.objects.filter(page__title=page_name))
-    articles.sort(key=lambda x: x.pub_date, reverse=True)
+@in_editor_time_zone
+def edit_page(request, slug):
+    page = get_page(slug)
     if request.method == 'POST':
-        show_on_whiteboard = 'show_on_whiteboard' in request.POST
         form = ArticleForm(request.POST)
         if form.is_valid():
             article = form.save(commit=False)
-            article.pub_date = timezone.now()
-            article.page = Page.objects.get(title=page_name)
-            article.show_on_whiteboard = show_on_whiteboard
+            article.page_id = page.id
+            article.show_on_whiteboard = page.title == NEWS_PAGE_NAME and 'show_on_whiteboard' in request.POST
             article.save()
-            return redirect(edit_url)
+            return redirect(page.edit_url)
     else:
         form = ArticleForm()
-    return render(request, 'edit_page.html', context={'page_name': page_name, 'form': form, 'articles': articles})
-
-
-@login_required
-@user_passes_test(is_superuser)
-def add_courses(request):
-    return render_edit_page_based_on_template(request, 'Kursy')
-
-
-@login_required
-@user_passes_test(is_superuser)
-def add_regulamin(request):
-    return render_edit_page_based_on_template(request, 'Regulamin')
-
-
-@login_required
-@user_passes_test(is_superuser)
-def add_privacy_policy(request):
-    return render_edit_page_based_on_template(request, 'Polityka Prywatności')
-
-
-@login_required
-@user_passes_test(is_superuser)
-def add_contact(request):
-    return render_edit_page_based_on_template(request, 'Kontakt')
-
-
-def index(request):
-    page_name = 'Główna'
-    pages = Page.objects.all()
-    articles = list(Article.objects.filter(page__title=page_name))
-    articles.sort(key=lambda x: x.pub_date, reverse=True)
-    news_articles = Article.objects.filter(page__title='Aktualności')
-    news_articles = list(news_articles.filter(show_on_whiteboard=True))
-    news_articles.sort(key=lambda x: x.pub_date, reverse=True)
-    default_pages_dict = {}
-    for page in pages:
-        if page.title not in ('Główna', page_name):
-            default_pages_dict.update({page.title: page.page_url.split('/')[0]})
-    return render(request, 'index.html', {'default_pages_dict': default_pages_dict, 'current_page_name': page_name, 'articles': articles, 'news_articles': news_articles})
-
-
-def news(request):
-    return render_page_based_on_index_template(request, "Aktualności")
-
-
-def courses(request):
-    return render_page_based_on_index_template(request, "Kursy")
-
+    articles = Article.objects.for_page(page.title).only(*EDITOR_LISTING_FIELDS)
+    context = {'page_name': page.title, 'form': form, **paginate_articles(request, articles)}
+    return render(request, 'edit_page.html', context=context)
 
-def regulamin(request):
-    return render_page_based_on_index_template(request, "Regulamin")
 
+@conditional_page(public_page_title)
+@cache_page_response(public_page_title)
+def page(request, slug=None):
+    entry = public_page(slug)
+    articles = Article.objects.for_page(entry.title).published()
+    context = {'current_page_name': entry.title, **paginate_articles(request, articles)}
+    if entry.slug == MAIN_PAGE_SLUG:
+        context['news_articles'] = get_whiteboard()
+    return render(request, entry.template, context)
 
-def privacy_policy(request):
-    return render_page_based_on_index_template(request, "Polityka Prywatności")
 
-
-def contact(request):
-    pages = Page.objects.all()
-    articles = list(Article.objects.filter(page__title='Kontakt'))
-    articles.sort(key=lambda x: x.pub_date, reverse=True)
-    default_pages_dict = {}
-    for page in pages:
-        if page.title not in ('Główna', 'Kontakt'):
-            default_pages_dict.update({page.title: page.page_url.split('/')[0]})
-    return render(request, 'contact.html', {'default_pages_dict': default_pages_dict, 'current_page_name': 'Kontakt',
-                                            'articles': articles})
+@require_safe
+def search(request):
+    query = request.GET.get('q', '').strip()
+    return render(request, 'search.html', {'current_page_name': 'Szukaj', 'query': query,
+                                           'results': search_articles(query)})
 
 
+@in_editor_time_zone
 def edit_article(request, article_id):
-    article = get_object_or_404(Article, pk=article_id)
-    articles = Article.objects.filter(page__title=article.page.title)
-    articles = articles.exclude(id=article_id)
+    article = get_object_or_404(Article.objects.select_related('page'), pk=article_id)
+    articles = Article.objects.for_page(article.page.title).exclude(id=article_id).only(*EDITOR_LISTING_FIELDS)
     if request.method == 'POST':
         form = ArticleForm(request.POST, instance=article)
         if form.is_valid():
@@ -148,10 +100,43 @@ def edit_article(request, article_id):
     else:
         form = ArticleForm(instance=article)
 
-    return render(request, 'edit_article.html', {'form': form, 'article': article, 'articles': articles, 'page_name': article.page.title})
+    return render(request, 'edit_article.html', {'form': form, 'article': article, 'page_name': article.page.title,
+                                                 **paginate_articles(request, articles)})
+
+
+@login_required
+@user_passes_test(is_superuser)
+@require_safe
+def article_body(request, article_id):
+    article = get_object_or_404(Article.objects.only('id', 'content_html'), pk=article_id)
+    return JsonResponse({'id': article.id, 'content_html': article.content_html})
 
 
 def delete_article(request, article_id):
     article = get_object_or_404(Article, pk=article_id)
     article.delete()
     return redirect(article.page.edit_url)
+
+
+@require_safe
+def metrics(request):
+    if not is_superuser(request.user) and request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise PermissionDenied
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@login_required
+@user_passes_test(is_superuser)
+@require_safe
+def export_articles(request):
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest('Unknown format')
+    try:
+        since = parse_timestamp(request.GET['since']) if request.GET.get('since') else None
+    except ValueError:
+        return HttpResponseBadRequest('Invalid since timestamp')
+    response = StreamingHttpResponse(export_lines(export_format, since),
+                                     content_type=f'{FORMATS[export_format]}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="articles.{export_format}"'
+    return response
@@ -0,0 +1,53 @@
+import logging
+import time
+
+from django.core.cache import caches
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import reverse
+
+from .cache import invalidate_all_pages
+from .forms import ArticleForm
+from .navigation import bump_nav_generation, get_nav_items
+from .prerender import public_page_paths, render_public_page
+from .sqlite_cache import SQLiteCache
+from .whiteboard import refresh_whiteboard
+
+logger = logging.getLogger(__name__)
+
+# Rendered through their views, which also fills the page, state, nav and whiteboard caches.
+PUBLIC_ROUTES = ('search', 'news_atom_feed', 'news_rss_feed')
+# Only reachable by editors, so they are compiled without being rendered.
+EDITOR_TEMPLATES = ('edit_page.html', 'edit_article.html')
+
+
+def warm_up():
+    """Pay the first-request costs of a worker once, in the gunicorn master before it forks.
+
+    Populates the URL resolver, compiles the templates, renders the CKEditor widget and renders
+    every public page and feed afresh, replacing what the shared cache held before the restart.
+    Database and cache connections are closed afterwards so that no worker inherits the master's.
+    Failures are logged rather than raised: a cold worker is still better than one that doesn't start.
+    """
+    started = time.monotonic()
+    try:
+        # Reversing loads the URLconf first, which registers the feed variants invalidate_all_pages drops.
+        paths = [*public_page_paths().values(), *(reverse(name) for name in PUBLIC_ROUTES)]
+        bump_nav_generation()
+        invalidate_all_pages()
+        refresh_whiteboard()
+        get_nav_items()
+        for path in paths:
+            render_public_page(path)
+        for name in EDITOR_TEMPLATES:
+            get_template(name)
+        ArticleForm().as_p()
+    except Exception:
+        logger.exception('Warm-up failed, workers will start cold')
+    else:
+        logger.info('Warmed up %d public pages in %.0f ms', len(paths), (time.monotonic() - started) * 1000)
+    finally:
+        connections.close_all()
+        for backend in caches.all(initialized_only=True):
+            if isinstance(backend, SQLiteCache):
+                backend.disconnect()
@@ -0,0 +1,47 @@
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .cache import cache_timeout
+from .models import Article
+
+WHITEBOARD_KEY = 'articles_app:whiteboard'
+
+WhiteboardItem = namedtuple('WhiteboardItem', ['id', 'title', 'excerpt'])
+
+
+def build_whiteboard():
+    """The WHITEBOARD_SIZE newest published whiteboard articles, and when the next scheduled one goes live."""
+    now = timezone.now()
+    articles = Article.objects.on_whiteboard()
+    items = [WhiteboardItem(*row) for row in
+             articles.published(now).values_list('id', 'title', 'excerpt')[:settings.WHITEBOARD_SIZE]]
+    next_publish = articles.filter(pub_date__gt=now).aggregate(next_publish=Min('pub_date'))['next_publish']
+    return items, next_publish
+
+
+def refresh_whiteboard():
+    items, next_publish = build_whiteboard()
+    cache.set(WHITEBOARD_KEY, items, cache_timeout(next_publish))
+    return items
+
+
+def get_whiteboard():
+    items = cache.get(WHITEBOARD_KEY)
+    return refresh_whiteboard() if items is None else items
+
+
+async def aget_whiteboard():
+    items = await cache.aget(WHITEBOARD_KEY)
+    return await sync_to_async(refresh_whiteboard)() if items is None else items
+
+
+def whiteboard_changed():
+    # Readers never rebuild from uncommitted rows: drop the list now and rebuild it once the write is visible.
+    cache.delete(WHITEBOARD_KEY)
+    transaction.on_commit(refresh_whiteboard)
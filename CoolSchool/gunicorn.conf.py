@@ -0,0 +1,34 @@
+"""
+Gunicorn configuration for CoolSchool, picked up automatically when gunicorn runs from this directory:
+
+    gunicorn
+
+The app is preloaded and warmed up in the master, so forked workers start with compiled templates,
+a populated URL resolver and primed caches instead of paying for them on their first requests.
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = 'CoolSchool.wsgi:application'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+accesslog = '-'
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before any worker is forked.
+    from articles_app.warmup import warm_up
+
+    warm_up()
+
+
+def post_fork(server, worker):
+    from django.conf import settings
+
+    # Timers don't survive the fork, so each worker schedules the prerendered pages' next publications itself.
+    if settings.PRERENDER_ON_SAVE:
+        from articles_app.prerender import schedule_prerender
+
+        schedule_prerender()